@@ -28,18 +28,19 @@ export default function DashboardPage() {
         setLoading(true);
         
         // Fetch organizations count
-        const orgsResponse = await api.organizations.getAll({ per_page: 1 });
+        const orgsResponse = await api.organizations.getAll({ per_page: 1, include_total: 1 });
         
         // Fetch devices count
         const devicesResponse = await api.devices.getAll({ per_page: 1 });
         
         // Fetch users count
-        const usersResponse = await api.users.getAll({ per_page: 1 });
+        const usersResponse = await api.users.getAll({ per_page: 1, include_total: 1 });
         
         // Fetch alerts count
         const alertsResponse = await api.telemetry.getAlerts({ 
           is_active: true,
-          per_page: 1
+          per_page: 1,
+          include_total: 1
         });
         
         setStats({
@@ -19,10 +19,26 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
     JWT_REFRESH_TOKEN_EXPIRES = 2592000  # 30 days
     
+    # Password hashing method of the seeded bootstrap admin user, which is
+    # created at startup. User passwords keep werkzeug's default method.
+    SEED_PASSWORD_HASH_METHOD = os.getenv('SEED_PASSWORD_HASH_METHOD', 'scrypt:16384:8:1')
+    
     # Database configuration
     SQLALCHEMY_DATABASE_URI = f"postgresql://{os.getenv('DB_USERNAME', 'postgres')}:{os.getenv('DB_PASSWORD', 'password')}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5432')}/{os.getenv('DB_NAME', 'starlink_platform')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool. LIFO checkout keeps the most recently used connections
+    # busy and lets surplus ones go idle; stale connections are recycled
+    # instead of pinged on every checkout unless DB_POOL_PRE_PING is set,
+    # for deployments that connect to Postgres directly.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '20')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '40')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'False').lower() == 'true',
+        'pool_use_lifo': True,
+    }
+    
     # Redis configuration
     REDIS_URL = f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/{os.getenv('REDIS_DB', '0')}"
     
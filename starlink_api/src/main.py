@@ -16,7 +16,10 @@ from src.routes.telemetry import telemetry_bp
 from src.routes.support import support_bp
 from src.routes.notification import notification_bp
 from src.utils.error_handlers import register_error_handlers
+from src.utils.cache import init_cache, cache_stats
+from src.utils.json_provider import OrjsonProvider
 from src.utils.init_db import init_db
+from src.utils.auth import get_permissions_mask, warm_role_masks, PERMISSIONS_CLAIM
 
 def create_app(config_class=Config):
     """
@@ -24,9 +27,11 @@ def create_app(config_class=Config):
     """
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = OrjsonProvider(app)
     
     # Initialize extensions
     db.init_app(app)
+    init_cache(app)
     CORS(app)
     jwt = JWTManager(app)
     
@@ -42,6 +47,12 @@ def create_app(config_class=Config):
     # Register error handlers
     register_error_handlers(app)
     
+    # Embed the permissions bitmask in issued tokens so permission checks
+    # don't need a database round-trip
+    @jwt.additional_claims_loader
+    def add_permissions_claim(identity):
+        return {PERMISSIONS_CLAIM: get_permissions_mask(identity)}
+    
     # JWT error handlers
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
@@ -74,13 +85,17 @@ def create_app(config_class=Config):
         # Initialize database with default data if INIT_DB environment variable is set
         if os.environ.get('INIT_DB', 'false').lower() == 'true':
             init_db()
+        
+        # Load role permissions before the first request checks them
+        warm_role_masks()
     
     @app.route('/api/health')
     def health_check():
         """Health check endpoint."""
         return jsonify({
             'status': 'ok',
-            'message': 'Starlink Platform API is running'
+            'message': 'Starlink Platform API is running',
+            'cache': dict(cache_stats)
         })
     
     return app
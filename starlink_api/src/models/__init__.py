@@ -4,8 +4,9 @@ Database models for the Starlink Platform API.
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 
-# Initialize SQLAlchemy
-db = SQLAlchemy()
+# Initialize SQLAlchemy. Column defaults are generated in Python, so objects
+# stay complete after commit and don't need to be reloaded to be serialized.
+db = SQLAlchemy(session_options={'expire_on_commit': False})
 
 # Initialize Marshmallow
 ma = Marshmallow()
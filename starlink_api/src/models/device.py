@@ -32,6 +32,11 @@ class Device(BaseModel):
     alert_configurations = db.relationship('AlertConfiguration', back_populates='device')
     alert_notifications = db.relationship('AlertNotification', back_populates='device')
     
+    # Telemetry and alert listings scope devices by organization
+    __table_args__ = (
+        db.Index('ix_devices_organization_id', 'organization_id'),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
@@ -2,6 +2,7 @@
 Organization-related models for the Starlink Platform API.
 """
 from datetime import datetime
+from sqlalchemy import event
 from src.models import db
 from src.models.base import BaseModel
 
@@ -24,7 +25,7 @@ class Organization(BaseModel):
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
-    parent = db.relationship('Organization', remote_side=[id], backref=db.backref('children', lazy='dynamic'))
+    parent = db.relationship('Organization', remote_side='Organization.id', backref=db.backref('children', lazy='dynamic'))
     users = db.relationship('OrganizationUser', back_populates='organization')
     service_plans = db.relationship('OrganizationServicePlan', back_populates='organization')
     devices = db.relationship('Device', back_populates='organization')
@@ -72,6 +73,16 @@ class OrganizationUser(db.Model):
     organization = db.relationship('Organization', back_populates='users')
     user = db.relationship('User', back_populates='organization_users')
     
+    # The (organization_id, user_id) primary key already serves pair lookups;
+    # this lets member listings be answered from the index alone
+    __table_args__ = (
+        db.Index(
+            'ix_organization_users_organization_covering',
+            'organization_id',
+            postgresql_include=['user_id', 'role', 'is_primary', 'created_at', 'updated_at']
+        ),
+    )
+    
     def __repr__(self):
         return f'<OrganizationUser {self.organization_id}:{self.user_id}>'
 
@@ -121,6 +132,7 @@ class OrganizationServicePlan(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    service_plan_snapshot = db.Column(db.JSON)
     
     # Relationships
     organization = db.relationship('Organization', back_populates='service_plans')
@@ -129,3 +141,16 @@ class OrganizationServicePlan(db.Model):
     def __repr__(self):
         return f'<OrganizationServicePlan {self.organization_id}:{self.service_plan_id}>'
 
+
+@event.listens_for(ServicePlan, 'after_update')
+def refresh_service_plan_snapshots(mapper, connection, target):
+    """Keep the service plan snapshots stored on organization assignments current."""
+    # Snapshots hold the API representation; schemas import the models
+    from src.schemas.organization import service_plan_schema
+    from src.utils.schema_jit import fast_dump
+    
+    connection.execute(
+        OrganizationServicePlan.__table__.update()
+        .where(OrganizationServicePlan.service_plan_id == target.id)
+        .values(service_plan_snapshot=fast_dump(service_plan_schema, target))
+    )
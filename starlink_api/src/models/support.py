@@ -24,6 +24,12 @@ class Ticket(BaseModel):
     assigned_user = db.relationship('User', foreign_keys=[assigned_to], back_populates='assigned_tickets')
     comments = db.relationship('TicketComment', back_populates='ticket', cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_tickets_created_at_id', 'created_at', 'id'),
+        db.Index('ix_tickets_organization_status_created_at', 'organization_id', 'status', 'created_at', 'id'),
+        db.Index('ix_tickets_user_created_at', 'user_id', 'created_at', 'id'),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
@@ -56,6 +62,10 @@ class TicketComment(BaseModel):
     ticket = db.relationship('Ticket', back_populates='comments')
     user = db.relationship('User', back_populates='ticket_comments')
     
+    __table_args__ = (
+        db.Index('ix_ticket_comments_ticket_created_at', 'ticket_id', 'created_at'),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
@@ -80,7 +90,7 @@ class KbCategory(BaseModel):
     parent_id = db.Column(db.String(36), db.ForeignKey('kb_categories.id'))
     
     # Relationships
-    parent = db.relationship('KbCategory', remote_side=[id], backref=db.backref('children', lazy='dynamic'))
+    parent = db.relationship('KbCategory', remote_side='KbCategory.id', backref=db.backref('children', lazy='dynamic'))
     articles = db.relationship('KbArticle', back_populates='category', cascade='all, delete-orphan')
     
     def to_dict(self):
@@ -113,6 +123,14 @@ class KbArticle(BaseModel):
     category = db.relationship('KbCategory', back_populates='articles')
     author = db.relationship('User', back_populates='kb_articles')
     
+    __table_args__ = (
+        db.Index('ix_kb_articles_created_at_id', 'created_at', 'id'),
+        db.Index(
+            'ix_kb_articles_published_category_created_at', 'category_id', 'created_at', 'id',
+            postgresql_where=db.text('is_published')
+        ),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
@@ -145,6 +163,11 @@ class ChatSession(BaseModel):
     agent = db.relationship('User', foreign_keys=[agent_id], back_populates='agent_sessions')
     messages = db.relationship('ChatMessage', back_populates='session', cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_chat_sessions_created_at_id', 'created_at', 'id'),
+        db.Index('ix_chat_sessions_agent_status_created_at', 'agent_id', 'status', 'created_at', 'id'),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
@@ -173,6 +196,10 @@ class ChatMessage(BaseModel):
     session = db.relationship('ChatSession', back_populates='messages')
     sender = db.relationship('User', back_populates='chat_messages')
     
+    __table_args__ = (
+        db.Index('ix_chat_messages_session_created_at', 'session_id', 'created_at'),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
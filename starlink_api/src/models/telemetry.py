@@ -11,6 +11,9 @@ class UserTerminalTelemetry(db.Model):
     
     time = db.Column(db.DateTime, primary_key=True)
     device_id = db.Column(db.String(36), db.ForeignKey('devices.id', ondelete='CASCADE'), primary_key=True)
+    # Owner of the device when the sample was taken, copied from the device
+    # so organization-scoped queries don't join devices
+    organization_id = db.Column(db.String(36), db.ForeignKey('organizations.id', ondelete='CASCADE'))
     downlink_throughput = db.Column(db.Float)
     uplink_throughput = db.Column(db.Float)
     ping_drop_rate_avg = db.Column(db.Float)
@@ -23,6 +26,28 @@ class UserTerminalTelemetry(db.Model):
     # Relationships
     device = db.relationship('Device', back_populates='user_terminal_telemetry')
     
+    # Performance stats average these columns over a device's or an
+    # organization's time range; including them lets the aggregate run as an
+    # index-only scan
+    __table_args__ = (
+        db.Index(
+            'ix_user_terminal_telemetry_device_time',
+            'device_id', 'time',
+            postgresql_include=[
+                'downlink_throughput', 'uplink_throughput', 'ping_latency_ms_avg',
+                'ping_drop_rate_avg', 'obstruction_percent_time', 'signal_quality'
+            ]
+        ),
+        db.Index(
+            'ix_user_terminal_telemetry_organization_time',
+            'organization_id', 'time',
+            postgresql_include=[
+                'downlink_throughput', 'uplink_throughput', 'ping_latency_ms_avg',
+                'ping_drop_rate_avg', 'obstruction_percent_time', 'signal_quality'
+            ]
+        ),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
@@ -48,6 +73,9 @@ class RouterTelemetry(db.Model):
     
     time = db.Column(db.DateTime, primary_key=True)
     device_id = db.Column(db.String(36), db.ForeignKey('devices.id', ondelete='CASCADE'), primary_key=True)
+    # Owner of the device when the sample was taken, copied from the device
+    # so organization-scoped queries don't join devices
+    organization_id = db.Column(db.String(36), db.ForeignKey('organizations.id', ondelete='CASCADE'))
     wifi_uptime_s = db.Column(db.Float)
     internet_ping_drop_rate = db.Column(db.Float)
     internet_ping_latency_ms = db.Column(db.Float)
@@ -66,6 +94,21 @@ class RouterTelemetry(db.Model):
     # Relationships
     device = db.relationship('Device', back_populates='router_telemetry')
     
+    # Usage stats sum these columns over a device's or an organization's
+    # time range
+    __table_args__ = (
+        db.Index(
+            'ix_router_telemetry_device_time',
+            'device_id', 'time',
+            postgresql_include=['wan_tx_bytes', 'wan_rx_bytes']
+        ),
+        db.Index(
+            'ix_router_telemetry_organization_time',
+            'organization_id', 'time',
+            postgresql_include=['wan_tx_bytes', 'wan_rx_bytes']
+        ),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
@@ -107,6 +150,15 @@ class Alert(BaseModel):
     # Relationships
     device = db.relationship('Device', back_populates='alerts')
     
+    __table_args__ = (
+        db.Index('ix_alerts_start_time_id', 'start_time', 'id'),
+        db.Index(
+            'ix_alerts_active_start_time_id',
+            'start_time', 'id',
+            postgresql_where=db.text('is_active')
+        ),
+    )
+    
     def to_dict(self):
         """Convert to dictionary."""
         return {
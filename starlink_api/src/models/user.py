@@ -2,6 +2,7 @@
 User-related models for the Starlink Platform API.
 """
 import bcrypt
+from datetime import datetime
 from src.models import db
 from src.models.base import BaseModel
 
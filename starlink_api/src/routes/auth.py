@@ -1,7 +1,7 @@
 """
 Authentication routes for the Starlink Platform API.
 """
-from flask import Blueprint, request, current_app, jsonify
+from flask import Blueprint, request, current_app, jsonify, g
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, 
     jwt_required, get_jwt_identity, get_jwt
@@ -14,6 +14,7 @@ from src.models.user import User, Role, UserRole
 from src.schemas.user import user_schema, login_schema, register_schema
 from src.utils.responses import success_response, error_response
 from src.utils.auth_middleware import jwt_required_with_refresh
+from src.utils.cache import invalidate
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -88,6 +89,7 @@ def login():
         # Update last login timestamp
         user.last_login_at = datetime.now(timezone.utc)
         db.session.commit()
+        invalidate(f"user:{user.id}")
         
         # Get user roles
         roles = [role.name for role in user.roles]
@@ -137,13 +139,8 @@ def refresh():
 def me():
     """Get current user data."""
     try:
-        # Get user ID from token
-        user_id = get_jwt_identity()
-        
-        # Get user from database
-        user = User.query.get(user_id)
-        if not user:
-            return error_response('User not found', status_code=404)
+        # Get user loaded by jwt_required_with_refresh
+        user = g.current_user
         
         # Get user roles
         roles = [{'id': role.id, 'name': role.name} for role in user.roles]
@@ -221,6 +218,7 @@ def change_password():
         # Update password
         user.password_hash = generate_password_hash(new_password)
         db.session.commit()
+        invalidate(f"user:{user_id}")
         
         # Return success response
         return success_response(message='Password changed successfully')
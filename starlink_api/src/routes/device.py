@@ -15,9 +15,13 @@ from src.schemas.device import (
 from src.utils.responses import success_response, error_response, pagination_response
 from src.utils.error_handlers import NotFoundError, ValidationError as APIValidationError
 from src.utils.auth import permission_required
+from src.utils.schema_jit import fast_dump, compile_schemas
 
 device_bp = Blueprint('device', __name__)
 
+compile_schemas(device_schema, device_configuration_schema, device_status_schema, ip_allocation_schema)
+
+
 @device_bp.route('', methods=['GET'])
 @jwt_required()
 @permission_required('device', 'read')
@@ -49,7 +53,7 @@ def get_devices():
         
         # Return paginated devices
         return pagination_response(
-            devices_schema.dump(pagination.items),
+            fast_dump(devices_schema, pagination.items),
             page,
             per_page,
             pagination.total
@@ -72,7 +76,7 @@ def get_device(device_id):
             raise NotFoundError('Device not found')
         
         # Return device
-        return success_response(device_schema.dump(device))
+        return success_response(fast_dump(device_schema, device))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -106,7 +110,7 @@ def create_device():
         db.session.commit()
         
         # Return created device
-        return success_response(device_schema.dump(data), 'Device created successfully', status_code=201)
+        return success_response(fast_dump(device_schema, data), 'Device created successfully', status_code=201)
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -140,7 +144,7 @@ def update_device(device_id):
         db.session.commit()
         
         # Return updated device
-        return success_response(device_schema.dump(data), 'Device updated successfully')
+        return success_response(fast_dump(device_schema, data), 'Device updated successfully')
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -194,7 +198,7 @@ def get_device_configurations(device_id):
         configurations = DeviceConfiguration.query.filter_by(device_id=device_id).all()
         
         # Return device configurations
-        return success_response(device_configurations_schema.dump(configurations))
+        return success_response(fast_dump(device_configurations_schema, configurations))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -229,7 +233,7 @@ def add_device_configuration(device_id):
             existing.config_value = data.config_value
             db.session.commit()
             return success_response(
-                device_configuration_schema.dump(existing),
+                fast_dump(device_configuration_schema, existing),
                 'Device configuration updated successfully'
             )
         
@@ -242,7 +246,7 @@ def add_device_configuration(device_id):
         
         # Return success message
         return success_response(
-            device_configuration_schema.dump(data),
+            fast_dump(device_configuration_schema, data),
             'Device configuration added successfully',
             status_code=201
         )
@@ -275,7 +279,7 @@ def get_device_status(device_id):
             return success_response(None)
         
         # Return device status
-        return success_response(device_status_schema.dump(status))
+        return success_response(fast_dump(device_status_schema, status))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -308,7 +312,7 @@ def update_device_status(device_id):
             status.details = data.details
             db.session.commit()
             return success_response(
-                device_status_schema.dump(status),
+                fast_dump(device_status_schema, status),
                 'Device status updated successfully'
             )
         
@@ -321,7 +325,7 @@ def update_device_status(device_id):
         
         # Return success message
         return success_response(
-            device_status_schema.dump(data),
+            fast_dump(device_status_schema, data),
             'Device status added successfully',
             status_code=201
         )
@@ -352,7 +356,7 @@ def get_device_ip_allocations(device_id):
         ip_allocations = IpAllocation.query.filter_by(device_id=device_id).all()
         
         # Return device IP allocations
-        return success_response(ip_allocations_schema.dump(ip_allocations))
+        return success_response(fast_dump(ip_allocations_schema, ip_allocations))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -385,7 +389,7 @@ def add_device_ip_allocation(device_id):
         
         # Return success message
         return success_response(
-            ip_allocation_schema.dump(data),
+            fast_dump(ip_allocation_schema, data),
             'Device IP allocation added successfully',
             status_code=201
         )
@@ -22,9 +22,16 @@ from src.schemas.notification import (
 from src.utils.responses import success_response, error_response, pagination_response
 from src.utils.error_handlers import NotFoundError, ValidationError as APIValidationError
 from src.utils.auth import permission_required
+from src.utils.schema_jit import fast_dump, compile_schemas
 
 notification_bp = Blueprint('notification', __name__)
 
+compile_schemas(
+    notification_template_schema, notification_schema, alert_configuration_schema,
+    notification_preference_schema
+)
+
+
 # Notification routes
 @notification_bp.route('/user', methods=['GET'])
 @jwt_required()
@@ -51,7 +58,7 @@ def get_user_notifications():
         
         # Return paginated notifications
         return pagination_response(
-            notifications_schema.dump(pagination.items),
+            fast_dump(notifications_schema, pagination.items),
             page,
             per_page,
             pagination.total
@@ -146,7 +153,7 @@ def get_notification_templates():
         
         # Return paginated templates
         return pagination_response(
-            notification_templates_schema.dump(pagination.items),
+            fast_dump(notification_templates_schema, pagination.items),
             page,
             per_page,
             pagination.total
@@ -169,7 +176,7 @@ def get_notification_template(template_id):
             raise NotFoundError('Notification template not found')
         
         # Return template
-        return success_response(notification_template_schema.dump(template))
+        return success_response(fast_dump(notification_template_schema, template))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -199,7 +206,7 @@ def create_notification_template():
         
         # Return created template
         return success_response(
-            notification_template_schema.dump(data),
+            fast_dump(notification_template_schema, data),
             'Notification template created successfully',
             status_code=201
         )
@@ -240,7 +247,7 @@ def update_notification_template(template_id):
         
         # Return updated template
         return success_response(
-            notification_template_schema.dump(data),
+            fast_dump(notification_template_schema, data),
             'Notification template updated successfully'
         )
     
@@ -294,7 +301,7 @@ def get_alert_configurations():
         
         # Return paginated configurations
         return pagination_response(
-            alert_configurations_schema.dump(pagination.items),
+            fast_dump(alert_configurations_schema, pagination.items),
             page,
             per_page,
             pagination.total
@@ -317,7 +324,7 @@ def get_alert_configuration(config_id):
             raise NotFoundError('Alert configuration not found')
         
         # Return configuration
-        return success_response(alert_configuration_schema.dump(config))
+        return success_response(fast_dump(alert_configuration_schema, config))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -353,7 +360,7 @@ def create_alert_configuration():
         
         # Return created configuration
         return success_response(
-            alert_configuration_schema.dump(data),
+            fast_dump(alert_configuration_schema, data),
             'Alert configuration created successfully',
             status_code=201
         )
@@ -394,7 +401,7 @@ def update_alert_configuration(config_id):
         
         # Return updated configuration
         return success_response(
-            alert_configuration_schema.dump(data),
+            fast_dump(alert_configuration_schema, data),
             'Alert configuration updated successfully'
         )
     
@@ -448,7 +455,7 @@ def get_notification_preferences():
         preferences = NotificationPreference.query.filter_by(user_id=user_id).all()
         
         # Return preferences
-        return success_response(notification_preferences_schema.dump(preferences))
+        return success_response(fast_dump(notification_preferences_schema, preferences))
     
     except Exception as e:
         current_app.logger.error(f"Get notification preferences error: {str(e)}")
@@ -492,7 +499,7 @@ def update_notification_preference(notification_type):
         
         # Return updated preference
         return success_response(
-            notification_preference_schema.dump(preference),
+            fast_dump(notification_preference_schema, preference),
             'Notification preference updated successfully'
         )
     
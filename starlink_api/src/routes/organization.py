@@ -1,9 +1,12 @@
 """
 Organization routes for the Starlink Platform API.
 """
+import uuid
+from itertools import chain
 from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy import select, func, cast, literal_column, lambda_stmt, bindparam
 from src.models import db
 from src.models.organization import Organization, OrganizationUser, ServicePlan, OrganizationServicePlan
 from src.models.user import User, UserRole
@@ -12,12 +15,85 @@ from src.schemas.organization import (
     organization_users_schema, service_plan_schema, service_plans_schema,
     organization_service_plan_schema, organization_service_plans_schema
 )
-from src.utils.responses import success_response, error_response, pagination_response
+from src.utils.responses import (
+    success_response, raw_success_response, error_response, stream_pagination_response
+)
 from src.utils.error_handlers import NotFoundError, ValidationError as APIValidationError
 from src.utils.auth import admin_required, permission_required
+from src.utils.cache import cached_json, invalidate
+from src.utils.schema_jit import fast_dump, get_dump_function, compile_schemas
 
 organization_bp = Blueprint('organization', __name__)
 
+compile_schemas(organization_schema, organization_users_schema, organization_service_plan_schema)
+
+# Statements compiled once per process and reused by the handlers below
+_ORG_BY_ID = lambda_stmt(
+    lambda: select(Organization).where(Organization.id == bindparam('oid'))
+)
+_ORG_USER_BY_PAIR = lambda_stmt(
+    lambda: select(OrganizationUser).where(
+        OrganizationUser.organization_id == bindparam('oid'),
+        OrganizationUser.user_id == bindparam('uid')
+    )
+)
+_ORG_SP_BY_PAIR = lambda_stmt(
+    lambda: select(OrganizationServicePlan).where(
+        OrganizationServicePlan.organization_id == bindparam('oid'),
+        OrganizationServicePlan.service_plan_id == bindparam('spid')
+    )
+)
+
+@organization_bp.url_value_preprocessor
+def stringify_uuid_args(endpoint, values):
+    """Convert UUID URL arguments back to the string ids used by the models."""
+    if values:
+        for key, value in values.items():
+            if isinstance(value, uuid.UUID):
+                values[key] = str(value)
+
+def _organization_service_plans_json(organization_id):
+    """
+    Build the JSON array of an organization's service plans in the database.
+    
+    Each item carries the service plan snapshot stored on the assignment, so
+    the whole payload comes back as a single text value without hydrating
+    ORM objects. Assignments stored before snapshots were taken fall back
+    to the joined service plan.
+    """
+    osp = OrganizationServicePlan.__table__
+    sp = ServicePlan.__table__
+    
+    item = func.json_build_object(
+        'organization_id', osp.c.organization_id,
+        'service_plan_id', osp.c.service_plan_id,
+        'start_date', osp.c.start_date,
+        'end_date', osp.c.end_date,
+        'is_active', osp.c.is_active,
+        'created_at', osp.c.created_at,
+        'updated_at', osp.c.updated_at,
+        'service_plan', func.coalesce(osp.c.service_plan_snapshot, func.json_build_object(
+            'id', sp.c.id,
+            'name', sp.c.name,
+            'description', sp.c.description,
+            'data_limit_gb', sp.c.data_limit_gb,
+            'speed_limit_mbps', sp.c.speed_limit_mbps,
+            'price', sp.c.price,
+            'currency', sp.c.currency,
+            'is_active', sp.c.is_active,
+            'created_at', sp.c.created_at,
+            'updated_at', sp.c.updated_at
+        ))
+    )
+    
+    stmt = (
+        select(cast(func.coalesce(func.json_agg(item), literal_column("'[]'::json")), db.Text))
+        .select_from(osp.outerjoin(sp, sp.c.id == osp.c.service_plan_id))
+        .where(osp.c.organization_id == organization_id)
+    )
+    
+    return db.session.execute(stmt).scalar_one()
+
 @organization_bp.route('', methods=['GET'])
 @jwt_required()
 @permission_required('organization', 'read')
@@ -28,41 +104,61 @@ def get_organizations():
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)
         
-        # Query organizations with pagination
-        pagination = Organization.query.paginate(page=page, per_page=per_page)
+        include_total = request.args.get('include_total', 0, type=int)
+        
+        # Page through organizations with a server-side cursor, probing for
+        # a next page instead of counting unless the total is asked for
+        total = None
+        if include_total:
+            total = db.session.scalar(select(func.count()).select_from(Organization))
+        organizations = (
+            Organization.query
+            .limit(per_page if include_total else per_page + 1)
+            .offset((max(page, 1) - 1) * per_page)
+            .yield_per(50)
+        )
         
-        # Return paginated organizations
-        return pagination_response(
-            organizations_schema.dump(pagination.items),
+        # Run the query before returning, so database errors are still
+        # answered here rather than after the response has started
+        rows = iter(organizations)
+        first_organization = next(rows, None)
+        if first_organization is not None:
+            rows = chain([first_organization], rows)
+        
+        # Return paginated organizations, streamed as they are serialized
+        return stream_pagination_response(
+            rows,
+            get_dump_function(organization_schema),
             page,
             per_page,
-            pagination.total
+            total
         )
     
     except Exception as e:
-        current_app.logger.error(f"Get organizations error: {str(e)}")
+        current_app.logger.error("Get organizations error: %s", e)
         return error_response('An error occurred while getting organizations', status_code=500)
 
 
-@organization_bp.route('/<organization_id>', methods=['GET'])
+@organization_bp.route('/<uuid:organization_id>', methods=['GET'])
 @jwt_required()
 @permission_required('organization', 'read')
+@cached_json(lambda organization_id: f"org:{organization_id}")
 def get_organization(organization_id):
     """Get organization by ID."""
     try:
         # Find organization
-        organization = Organization.query.get(organization_id)
+        organization = db.session.execute(_ORG_BY_ID, {'oid': organization_id}).scalar_one_or_none()
         if not organization:
             raise NotFoundError('Organization not found')
         
         # Return organization
-        return success_response(organization_schema.dump(organization))
+        return success_response(fast_dump(organization_schema, organization))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
     
     except Exception as e:
-        current_app.logger.error(f"Get organization error: {str(e)}")
+        current_app.logger.error("Get organization error: %s", e)
         return error_response('An error occurred while getting organization', status_code=500)
 
 
@@ -80,24 +176,24 @@ def create_organization():
         db.session.commit()
         
         # Return created organization
-        return success_response(organization_schema.dump(data), 'Organization created successfully', status_code=201)
+        return success_response(fast_dump(organization_schema, data), 'Organization created successfully', status_code=201)
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
     
     except Exception as e:
-        current_app.logger.error(f"Create organization error: {str(e)}")
+        current_app.logger.error("Create organization error: %s", e)
         return error_response('An error occurred while creating organization', status_code=500)
 
 
-@organization_bp.route('/<organization_id>', methods=['PUT'])
+@organization_bp.route('/<uuid:organization_id>', methods=['PUT'])
 @jwt_required()
 @permission_required('organization', 'update')
 def update_organization(organization_id):
     """Update organization by ID."""
     try:
         # Find organization
-        organization = Organization.query.get(organization_id)
+        organization = db.session.execute(_ORG_BY_ID, {'oid': organization_id}).scalar_one_or_none()
         if not organization:
             raise NotFoundError('Organization not found')
         
@@ -106,9 +202,10 @@ def update_organization(organization_id):
         
         # Save changes to database
         db.session.commit()
+        invalidate(f"org:{organization_id}")
         
         # Return updated organization
-        return success_response(organization_schema.dump(data), 'Organization updated successfully')
+        return success_response(fast_dump(organization_schema, data), 'Organization updated successfully')
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -117,24 +214,29 @@ def update_organization(organization_id):
         return error_response(str(e), status_code=404)
     
     except Exception as e:
-        current_app.logger.error(f"Update organization error: {str(e)}")
+        current_app.logger.error("Update organization error: %s", e)
         return error_response('An error occurred while updating organization', status_code=500)
 
 
-@organization_bp.route('/<organization_id>', methods=['DELETE'])
+@organization_bp.route('/<uuid:organization_id>', methods=['DELETE'])
 @jwt_required()
 @admin_required
 def delete_organization(organization_id):
     """Delete organization by ID."""
     try:
         # Find organization
-        organization = Organization.query.get(organization_id)
+        organization = db.session.execute(_ORG_BY_ID, {'oid': organization_id}).scalar_one_or_none()
         if not organization:
             raise NotFoundError('Organization not found')
         
         # Delete organization from database
         db.session.delete(organization)
         db.session.commit()
+        invalidate(
+            f"org:{organization_id}",
+            f"org:{organization_id}:users",
+            f"org:{organization_id}:service-plans"
+        )
         
         # Return success message
         return success_response(message='Organization deleted successfully')
@@ -143,18 +245,19 @@ def delete_organization(organization_id):
         return error_response(str(e), status_code=404)
     
     except Exception as e:
-        current_app.logger.error(f"Delete organization error: {str(e)}")
+        current_app.logger.error("Delete organization error: %s", e)
         return error_response('An error occurred while deleting organization', status_code=500)
 
 
-@organization_bp.route('/<organization_id>/users', methods=['GET'])
+@organization_bp.route('/<uuid:organization_id>/users', methods=['GET'])
 @jwt_required()
 @permission_required('organization', 'read')
+@cached_json(lambda organization_id: f"org:{organization_id}:users")
 def get_organization_users(organization_id):
     """Get organization users."""
     try:
         # Find organization
-        organization = Organization.query.get(organization_id)
+        organization = db.session.execute(_ORG_BY_ID, {'oid': organization_id}).scalar_one_or_none()
         if not organization:
             raise NotFoundError('Organization not found')
         
@@ -162,24 +265,24 @@ def get_organization_users(organization_id):
         organization_users = OrganizationUser.query.filter_by(organization_id=organization_id).all()
         
         # Return organization users
-        return success_response(organization_users_schema.dump(organization_users))
+        return success_response(fast_dump(organization_users_schema, organization_users))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
     
     except Exception as e:
-        current_app.logger.error(f"Get organization users error: {str(e)}")
+        current_app.logger.error("Get organization users error: %s", e)
         return error_response('An error occurred while getting organization users', status_code=500)
 
 
-@organization_bp.route('/<organization_id>/users', methods=['POST'])
+@organization_bp.route('/<uuid:organization_id>/users', methods=['POST'])
 @jwt_required()
 @permission_required('organization', 'update')
 def add_organization_user(organization_id):
     """Add user to organization."""
     try:
         # Find organization
-        organization = Organization.query.get(organization_id)
+        organization = db.session.execute(_ORG_BY_ID, {'oid': organization_id}).scalar_one_or_none()
         if not organization:
             raise NotFoundError('Organization not found')
         
@@ -192,10 +295,9 @@ def add_organization_user(organization_id):
             raise NotFoundError('User not found')
         
         # Check if user is already in organization
-        existing = OrganizationUser.query.filter_by(
-            organization_id=organization_id,
-            user_id=data.user_id
-        ).first()
+        existing = db.session.execute(
+            _ORG_USER_BY_PAIR, {'oid': organization_id, 'uid': data.user_id}
+        ).scalar_one_or_none()
         
         if existing:
             raise APIValidationError('User is already in organization')
@@ -206,10 +308,11 @@ def add_organization_user(organization_id):
         # Save to database
         db.session.add(data)
         db.session.commit()
+        invalidate(f"org:{organization_id}:users")
         
         # Return success message
         return success_response(
-            organization_user_schema.dump(data),
+            fast_dump(organization_user_schema, data),
             'User added to organization successfully',
             status_code=201
         )
@@ -224,21 +327,20 @@ def add_organization_user(organization_id):
         return error_response(str(e))
     
     except Exception as e:
-        current_app.logger.error(f"Add organization user error: {str(e)}")
+        current_app.logger.error("Add organization user error: %s", e)
         return error_response('An error occurred while adding user to organization', status_code=500)
 
 
-@organization_bp.route('/<organization_id>/users/<user_id>', methods=['DELETE'])
+@organization_bp.route('/<uuid:organization_id>/users/<uuid:user_id>', methods=['DELETE'])
 @jwt_required()
 @permission_required('organization', 'update')
 def remove_organization_user(organization_id, user_id):
     """Remove user from organization."""
     try:
         # Find organization user
-        organization_user = OrganizationUser.query.filter_by(
-            organization_id=organization_id,
-            user_id=user_id
-        ).first()
+        organization_user = db.session.execute(
+            _ORG_USER_BY_PAIR, {'oid': organization_id, 'uid': user_id}
+        ).scalar_one_or_none()
         
         if not organization_user:
             raise NotFoundError('User not found in organization')
@@ -246,6 +348,7 @@ def remove_organization_user(organization_id, user_id):
         # Delete organization user from database
         db.session.delete(organization_user)
         db.session.commit()
+        invalidate(f"org:{organization_id}:users")
         
         # Return success message
         return success_response(message='User removed from organization successfully')
@@ -254,43 +357,41 @@ def remove_organization_user(organization_id, user_id):
         return error_response(str(e), status_code=404)
     
     except Exception as e:
-        current_app.logger.error(f"Remove organization user error: {str(e)}")
+        current_app.logger.error("Remove organization user error: %s", e)
         return error_response('An error occurred while removing user from organization', status_code=500)
 
 
-@organization_bp.route('/<organization_id>/service-plans', methods=['GET'])
+@organization_bp.route('/<uuid:organization_id>/service-plans', methods=['GET'])
 @jwt_required()
 @permission_required('organization', 'read')
+@cached_json(lambda organization_id: f"org:{organization_id}:service-plans")
 def get_organization_service_plans(organization_id):
     """Get organization service plans."""
     try:
         # Find organization
-        organization = Organization.query.get(organization_id)
+        organization = db.session.execute(_ORG_BY_ID, {'oid': organization_id}).scalar_one_or_none()
         if not organization:
             raise NotFoundError('Organization not found')
         
-        # Get organization service plans
-        organization_service_plans = OrganizationServicePlan.query.filter_by(organization_id=organization_id).all()
-        
-        # Return organization service plans
-        return success_response(organization_service_plans_schema.dump(organization_service_plans))
+        # Return organization service plans, serialized by the database
+        return raw_success_response(_organization_service_plans_json(organization_id))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
     
     except Exception as e:
-        current_app.logger.error(f"Get organization service plans error: {str(e)}")
+        current_app.logger.error("Get organization service plans error: %s", e)
         return error_response('An error occurred while getting organization service plans', status_code=500)
 
 
-@organization_bp.route('/<organization_id>/service-plans', methods=['POST'])
+@organization_bp.route('/<uuid:organization_id>/service-plans', methods=['POST'])
 @jwt_required()
 @permission_required('organization', 'update')
 def add_organization_service_plan(organization_id):
     """Add service plan to organization."""
     try:
         # Find organization
-        organization = Organization.query.get(organization_id)
+        organization = db.session.execute(_ORG_BY_ID, {'oid': organization_id}).scalar_one_or_none()
         if not organization:
             raise NotFoundError('Organization not found')
         
@@ -303,24 +404,25 @@ def add_organization_service_plan(organization_id):
             raise NotFoundError('Service plan not found')
         
         # Check if service plan is already assigned to organization
-        existing = OrganizationServicePlan.query.filter_by(
-            organization_id=organization_id,
-            service_plan_id=data.service_plan_id
-        ).first()
+        existing = db.session.execute(
+            _ORG_SP_BY_PAIR, {'oid': organization_id, 'spid': data.service_plan_id}
+        ).scalar_one_or_none()
         
         if existing:
             raise APIValidationError('Service plan is already assigned to organization')
         
-        # Set organization ID
+        # Set organization ID and snapshot the service plan for listings
         data.organization_id = organization_id
+        data.service_plan_snapshot = fast_dump(service_plan_schema, service_plan)
         
         # Save to database
         db.session.add(data)
         db.session.commit()
+        invalidate(f"org:{organization_id}:service-plans")
         
         # Return success message
         return success_response(
-            organization_service_plan_schema.dump(data),
+            fast_dump(organization_service_plan_schema, data),
             'Service plan added to organization successfully',
             status_code=201
         )
@@ -335,6 +437,6 @@ def add_organization_service_plan(organization_id):
         return error_response(str(e))
     
     except Exception as e:
-        current_app.logger.error(f"Add organization service plan error: {str(e)}")
+        current_app.logger.error("Add organization service plan error: %s", e)
         return error_response('An error occurred while adding service plan to organization', status_code=500)
 
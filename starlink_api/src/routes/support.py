@@ -1,42 +1,87 @@
 """
 Support routes for the Starlink Platform API.
 """
+import uuid
 from datetime import datetime
-from flask import Blueprint, request, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from itertools import chain
+from flask import Blueprint, request, current_app, g
 from marshmallow import ValidationError
+from sqlalchemy import select, insert, literal, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import raiseload, load_only
 from src.models import db
 from src.models.support import Ticket, TicketComment, KbCategory, KbArticle, ChatSession, ChatMessage
 from src.models.user import User
 from src.models.organization import Organization
 from src.schemas.support import (
-    ticket_schema, tickets_schema, ticket_comment_schema, ticket_comments_schema,
-    kb_category_schema, kb_categories_schema, kb_article_schema, kb_articles_schema,
-    chat_session_schema, chat_sessions_schema, chat_message_schema, chat_messages_schema
+    ticket_schema, ticket_list_schema, ticket_comment_schema, ticket_comments_schema,
+    kb_category_schema, kb_article_schema, kb_article_list_schema,
+    chat_session_schema, chat_sessions_schema, chat_message_schema
+)
+from src.utils.responses import (
+    success_response, error_response, pagination_response, keyset_pagination_response,
+    entity_etag, conditional_response, stream_list_response
 )
-from src.utils.responses import success_response, error_response, pagination_response
 from src.utils.error_handlers import NotFoundError, ValidationError as APIValidationError
-from src.utils.auth import permission_required
+from src.utils.auth import load_request_identity, auth_required
+from src.utils.pagination import keyset_paginate, offset_paginate
+from src.utils.cache import cached_json, invalidate_prefix, request_cache_key
+from src.utils.schema_jit import fast_dump, get_dump_function, compile_schemas
 
 support_bp = Blueprint('support', __name__)
 
+# Every support route needs a token, so verify it once per request
+support_bp.before_request(load_request_identity)
+
+compile_schemas(
+    ticket_schema, ticket_list_schema, ticket_comment_schema, kb_category_schema,
+    kb_article_schema, kb_article_list_schema, chat_session_schema, chat_message_schema
+)
+
+def _commit_without_wal_flush():
+    """
+    Let the current transaction commit without waiting for the WAL flush.
+    
+    Only used for low-value inserts like comments and chat messages, where
+    losing the last few writes on a database crash is acceptable.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text("SET LOCAL synchronous_commit = OFF"))
+
+
+# SQLSTATE of a foreign key violation
+FOREIGN_KEY_VIOLATION = '23503'
+
+def _is_foreign_key_violation(error):
+    """Check whether an IntegrityError was raised by a foreign key constraint."""
+    orig = error.orig
+    return (getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)) == FOREIGN_KEY_VIOLATION
+
+
 # Ticket routes
 @support_bp.route('/tickets', methods=['GET'])
-@jwt_required()
-@permission_required('support', 'read')
+@auth_required('support', 'read')
 def get_tickets():
     """Get all tickets."""
     try:
         # Get query parameters
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)
+        include_total = request.args.get('include_total', 0, type=int)
         organization_id = request.args.get('organization_id')
         user_id = request.args.get('user_id')
         status = request.args.get('status')
         priority = request.args.get('priority')
         
-        # Build query
-        query = Ticket.query
+        # Build query, loading only the columns listed and refusing lazy loads
+        query = Ticket.query.options(
+            load_only(
+                Ticket.id, Ticket.organization_id, Ticket.user_id, Ticket.subject,
+                Ticket.status, Ticket.priority, Ticket.assigned_to, Ticket.closed_at,
+                Ticket.created_at, Ticket.updated_at
+            ),
+            raiseload('*')
+        )
         
         # Apply filters
         if organization_id:
@@ -51,35 +96,48 @@ def get_tickets():
         if priority:
             query = query.filter_by(priority=priority)
         
-        # Query tickets with pagination
-        pagination = query.order_by(Ticket.created_at.desc()).paginate(page=page, per_page=per_page)
+        # Page by position when a cursor is given, avoiding OFFSET and COUNT
+        if 'cursor' in request.args:
+            tickets, next_cursor = keyset_paginate(query, Ticket, request.args['cursor'], per_page)
+            return keyset_pagination_response(fast_dump(ticket_list_schema, tickets), per_page, next_cursor)
+        
+        # Query tickets with pagination, probing for a next page instead of
+        # counting unless the total is asked for
+        tickets, has_more = offset_paginate(query.order_by(Ticket.created_at.desc()), page, per_page)
+        total = query.count() if include_total else None
         
         # Return paginated tickets
         return pagination_response(
-            tickets_schema.dump(pagination.items),
+            fast_dump(ticket_list_schema, tickets),
             page,
             per_page,
-            pagination.total
+            total=total,
+            has_more=has_more
         )
     
+    except APIValidationError as e:
+        return error_response(e.message)
+    
     except Exception as e:
         current_app.logger.error(f"Get tickets error: {str(e)}")
         return error_response('An error occurred while getting tickets', status_code=500)
 
 
 @support_bp.route('/tickets/<ticket_id>', methods=['GET'])
-@jwt_required()
-@permission_required('support', 'read')
+@auth_required('support', 'read')
 def get_ticket(ticket_id):
     """Get ticket by ID."""
     try:
-        # Find ticket
-        ticket = Ticket.query.get(ticket_id)
-        if not ticket:
+        # Find ticket version
+        version = db.session.query(Ticket.updated_at).filter_by(id=ticket_id).first()
+        if not version:
             raise NotFoundError('Ticket not found')
         
-        # Return ticket
-        return success_response(ticket_schema.dump(ticket))
+        # Return ticket, or 304 when the client's copy is current
+        return conditional_response(
+            entity_etag(ticket_id, version.updated_at),
+            lambda: success_response(fast_dump(ticket_schema, Ticket.query.get(ticket_id)))
+        )
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -90,20 +148,21 @@ def get_ticket(ticket_id):
 
 
 @support_bp.route('/tickets', methods=['POST'])
-@jwt_required()
-@permission_required('support', 'create')
+@auth_required('support', 'create')
 def create_ticket():
     """Create a new ticket."""
     try:
         # Get current user ID from token
-        current_user_id = get_jwt_identity()
+        current_user_id = g.user_id
         
         # Validate request data
         data = ticket_schema.load(request.json)
         
         # Check if organization exists
-        organization = Organization.query.get(data.organization_id)
-        if not organization:
+        organization_exists = db.session.query(
+            Organization.query.filter_by(id=data.organization_id).exists()
+        ).scalar()
+        if not organization_exists:
             raise NotFoundError('Organization not found')
         
         # Set user ID to current user if not provided
@@ -115,7 +174,7 @@ def create_ticket():
         db.session.commit()
         
         # Return created ticket
-        return success_response(ticket_schema.dump(data), 'Ticket created successfully', status_code=201)
+        return success_response(fast_dump(ticket_schema, data), 'Ticket created successfully', status_code=201)
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -129,8 +188,7 @@ def create_ticket():
 
 
 @support_bp.route('/tickets/<ticket_id>', methods=['PUT'])
-@jwt_required()
-@permission_required('support', 'update')
+@auth_required('support', 'update')
 def update_ticket(ticket_id):
     """Update ticket by ID."""
     try:
@@ -146,7 +204,7 @@ def update_ticket(ticket_id):
         db.session.commit()
         
         # Return updated ticket
-        return success_response(ticket_schema.dump(data), 'Ticket updated successfully')
+        return success_response(fast_dump(ticket_schema, data), 'Ticket updated successfully')
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -160,21 +218,21 @@ def update_ticket(ticket_id):
 
 
 @support_bp.route('/tickets/<ticket_id>/comments', methods=['GET'])
-@jwt_required()
-@permission_required('support', 'read')
+@auth_required('support', 'read')
 def get_ticket_comments(ticket_id):
     """Get ticket comments."""
     try:
-        # Find ticket
-        ticket = Ticket.query.get(ticket_id)
-        if not ticket:
-            raise NotFoundError('Ticket not found')
-        
         # Get ticket comments
         comments = TicketComment.query.filter_by(ticket_id=ticket_id).order_by(TicketComment.created_at).all()
         
+        # Only check the ticket when there are no comments to imply it exists
+        if not comments:
+            ticket_exists = db.session.query(Ticket.query.filter_by(id=ticket_id).exists()).scalar()
+            if not ticket_exists:
+                raise NotFoundError('Ticket not found')
+        
         # Return ticket comments
-        return success_response(ticket_comments_schema.dump(comments))
+        return success_response(fast_dump(ticket_comments_schema, comments))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -185,18 +243,12 @@ def get_ticket_comments(ticket_id):
 
 
 @support_bp.route('/tickets/<ticket_id>/comments', methods=['POST'])
-@jwt_required()
-@permission_required('support', 'update')
+@auth_required('support', 'update')
 def add_ticket_comment(ticket_id):
     """Add comment to ticket."""
     try:
         # Get current user ID from token
-        current_user_id = get_jwt_identity()
-        
-        # Find ticket
-        ticket = Ticket.query.get(ticket_id)
-        if not ticket:
-            raise NotFoundError('Ticket not found')
+        current_user_id = g.user_id
         
         # Validate request data
         data = ticket_comment_schema.load(request.json)
@@ -205,13 +257,20 @@ def add_ticket_comment(ticket_id):
         data.ticket_id = ticket_id
         data.user_id = current_user_id
         
-        # Save to database
+        # Save to database, letting the ticket foreign key reject unknown tickets
+        _commit_without_wal_flush()
         db.session.add(data)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not _is_foreign_key_violation(e):
+                raise
+            raise NotFoundError('Ticket not found')
         
         # Return success message
         return success_response(
-            ticket_comment_schema.dump(data),
+            fast_dump(ticket_comment_schema, data),
             'Comment added successfully',
             status_code=201
         )
@@ -229,28 +288,27 @@ def add_ticket_comment(ticket_id):
 
 # Knowledge Base routes
 @support_bp.route('/kb/categories', methods=['GET'])
-@jwt_required()
+@auth_required()
+@cached_json(lambda: request_cache_key('kb:categories:'), timeout=300)
 def get_kb_categories():
     """Get all knowledge base categories."""
     try:
         # Get query parameters
         parent_id = request.args.get('parent_id')
         
-        # Build query
-        query = KbCategory.query
-        
-        # Apply filters
-        if parent_id:
-            query = query.filter_by(parent_id=parent_id)
-        else:
-            # Get top-level categories (no parent)
-            query = query.filter_by(parent_id=None)
+        # Select the dumped columns only; categories are plain rows, so
+        # there is nothing to gain from building ORM objects for them.
+        # Without a parent, get top-level categories.
+        query = select(
+            KbCategory.id, KbCategory.name, KbCategory.description, KbCategory.parent_id,
+            KbCategory.created_at, KbCategory.updated_at
+        ).where(KbCategory.parent_id == (parent_id or None))
         
         # Get categories
-        categories = query.all()
+        categories = db.session.execute(query).mappings()
         
         # Return categories
-        return success_response(kb_categories_schema.dump(categories))
+        return success_response([dict(category) for category in categories])
     
     except Exception as e:
         current_app.logger.error(f"Get KB categories error: {str(e)}")
@@ -258,17 +316,20 @@ def get_kb_categories():
 
 
 @support_bp.route('/kb/categories/<category_id>', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_kb_category(category_id):
     """Get knowledge base category by ID."""
     try:
-        # Find category
-        category = KbCategory.query.get(category_id)
-        if not category:
+        # Find category version
+        version = db.session.query(KbCategory.updated_at).filter_by(id=category_id).first()
+        if not version:
             raise NotFoundError('Category not found')
         
-        # Return category
-        return success_response(kb_category_schema.dump(category))
+        # Return category, or 304 when the client's copy is current
+        return conditional_response(
+            entity_etag(category_id, version.updated_at),
+            lambda: success_response(fast_dump(kb_category_schema, KbCategory.query.get(category_id)))
+        )
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -279,26 +340,27 @@ def get_kb_category(category_id):
 
 
 @support_bp.route('/kb/categories', methods=['POST'])
-@jwt_required()
-@permission_required('support', 'create')
+@auth_required('support', 'create')
 def create_kb_category():
     """Create a new knowledge base category."""
     try:
         # Validate request data
         data = kb_category_schema.load(request.json)
         
-        # Check if parent category exists if provided
-        if data.parent_id:
-            parent = KbCategory.query.get(data.parent_id)
-            if not parent:
-                raise NotFoundError('Parent category not found')
-        
-        # Save category to database
+        # Save category to database, letting the parent foreign key reject
+        # unknown parent categories
         db.session.add(data)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not _is_foreign_key_violation(e):
+                raise
+            raise NotFoundError('Parent category not found')
+        invalidate_prefix('kb:categories:')
         
         # Return created category
-        return success_response(kb_category_schema.dump(data), 'Category created successfully', status_code=201)
+        return success_response(fast_dump(kb_category_schema, data), 'Category created successfully', status_code=201)
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -312,18 +374,27 @@ def create_kb_category():
 
 
 @support_bp.route('/kb/articles', methods=['GET'])
-@jwt_required()
+@auth_required()
+@cached_json(lambda: request_cache_key('kb:articles:'), timeout=300)
 def get_kb_articles():
     """Get knowledge base articles."""
     try:
         # Get query parameters
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)
+        include_total = request.args.get('include_total', 0, type=int)
         category_id = request.args.get('category_id')
         is_published = request.args.get('is_published', type=bool)
         
-        # Build query
-        query = KbArticle.query
+        # Build query, leaving out article content and refusing lazy loads
+        query = KbArticle.query.options(
+            load_only(
+                KbArticle.id, KbArticle.category_id, KbArticle.title, KbArticle.author_id,
+                KbArticle.published_at, KbArticle.is_published,
+                KbArticle.created_at, KbArticle.updated_at
+            ),
+            raiseload('*')
+        )
         
         # Apply filters
         if category_id:
@@ -332,34 +403,48 @@ def get_kb_articles():
         if is_published is not None:
             query = query.filter_by(is_published=is_published)
         
-        # Query articles with pagination
-        pagination = query.order_by(KbArticle.created_at.desc()).paginate(page=page, per_page=per_page)
+        # Page by position when a cursor is given, avoiding OFFSET and COUNT
+        if 'cursor' in request.args:
+            articles, next_cursor = keyset_paginate(query, KbArticle, request.args['cursor'], per_page)
+            return keyset_pagination_response(fast_dump(kb_article_list_schema, articles), per_page, next_cursor)
+        
+        # Query articles with pagination, probing for a next page instead of
+        # counting unless the total is asked for
+        articles, has_more = offset_paginate(query.order_by(KbArticle.created_at.desc()), page, per_page)
+        total = query.count() if include_total else None
         
         # Return paginated articles
         return pagination_response(
-            kb_articles_schema.dump(pagination.items),
+            fast_dump(kb_article_list_schema, articles),
             page,
             per_page,
-            pagination.total
+            total=total,
+            has_more=has_more
         )
     
+    except APIValidationError as e:
+        return error_response(e.message)
+    
     except Exception as e:
         current_app.logger.error(f"Get KB articles error: {str(e)}")
         return error_response('An error occurred while getting knowledge base articles', status_code=500)
 
 
 @support_bp.route('/kb/articles/<article_id>', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_kb_article(article_id):
     """Get knowledge base article by ID."""
     try:
-        # Find article
-        article = KbArticle.query.get(article_id)
-        if not article:
+        # Find article version
+        version = db.session.query(KbArticle.updated_at).filter_by(id=article_id).first()
+        if not version:
             raise NotFoundError('Article not found')
         
-        # Return article
-        return success_response(kb_article_schema.dump(article))
+        # Return article, or 304 when the client's copy is current
+        return conditional_response(
+            entity_etag(article_id, version.updated_at),
+            lambda: success_response(fast_dump(kb_article_schema, KbArticle.query.get(article_id)))
+        )
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -370,20 +455,21 @@ def get_kb_article(article_id):
 
 
 @support_bp.route('/kb/articles', methods=['POST'])
-@jwt_required()
-@permission_required('support', 'create')
+@auth_required('support', 'create')
 def create_kb_article():
     """Create a new knowledge base article."""
     try:
         # Get current user ID from token
-        current_user_id = get_jwt_identity()
+        current_user_id = g.user_id
         
         # Validate request data
         data = kb_article_schema.load(request.json)
         
         # Check if category exists
-        category = KbCategory.query.get(data.category_id)
-        if not category:
+        category_exists = db.session.query(
+            KbCategory.query.filter_by(id=data.category_id).exists()
+        ).scalar()
+        if not category_exists:
             raise NotFoundError('Category not found')
         
         # Set author ID to current user if not provided
@@ -393,9 +479,10 @@ def create_kb_article():
         # Save article to database
         db.session.add(data)
         db.session.commit()
+        invalidate_prefix('kb:articles:')
         
         # Return created article
-        return success_response(kb_article_schema.dump(data), 'Article created successfully', status_code=201)
+        return success_response(fast_dump(kb_article_schema, data), 'Article created successfully', status_code=201)
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -409,8 +496,7 @@ def create_kb_article():
 
 
 @support_bp.route('/kb/articles/<article_id>', methods=['PUT'])
-@jwt_required()
-@permission_required('support', 'update')
+@auth_required('support', 'update')
 def update_kb_article(article_id):
     """Update knowledge base article by ID."""
     try:
@@ -430,9 +516,10 @@ def update_kb_article(article_id):
         
         # Save changes to database
         db.session.commit()
+        invalidate_prefix('kb:articles:')
         
         # Return updated article
-        return success_response(kb_article_schema.dump(data), 'Article updated successfully')
+        return success_response(fast_dump(kb_article_schema, data), 'Article updated successfully')
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -447,20 +534,20 @@ def update_kb_article(article_id):
 
 # Chat routes
 @support_bp.route('/chat/sessions', methods=['GET'])
-@jwt_required()
-@permission_required('support', 'read')
+@auth_required('support', 'read')
 def get_chat_sessions():
     """Get chat sessions."""
     try:
         # Get query parameters
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)
+        include_total = request.args.get('include_total', 0, type=int)
         user_id = request.args.get('user_id')
         agent_id = request.args.get('agent_id')
         status = request.args.get('status')
         
-        # Build query
-        query = ChatSession.query
+        # Build query, refusing lazy loads since the schema only dumps columns
+        query = ChatSession.query.options(raiseload('*'))
         
         # Apply filters
         if user_id:
@@ -472,35 +559,48 @@ def get_chat_sessions():
         if status:
             query = query.filter_by(status=status)
         
-        # Query chat sessions with pagination
-        pagination = query.order_by(ChatSession.created_at.desc()).paginate(page=page, per_page=per_page)
+        # Page by position when a cursor is given, avoiding OFFSET and COUNT
+        if 'cursor' in request.args:
+            sessions, next_cursor = keyset_paginate(query, ChatSession, request.args['cursor'], per_page)
+            return keyset_pagination_response(fast_dump(chat_sessions_schema, sessions), per_page, next_cursor)
+        
+        # Query chat sessions with pagination, probing for a next page instead of
+        # counting unless the total is asked for
+        sessions, has_more = offset_paginate(query.order_by(ChatSession.created_at.desc()), page, per_page)
+        total = query.count() if include_total else None
         
         # Return paginated chat sessions
         return pagination_response(
-            chat_sessions_schema.dump(pagination.items),
+            fast_dump(chat_sessions_schema, sessions),
             page,
             per_page,
-            pagination.total
+            total=total,
+            has_more=has_more
         )
     
+    except APIValidationError as e:
+        return error_response(e.message)
+    
     except Exception as e:
         current_app.logger.error(f"Get chat sessions error: {str(e)}")
         return error_response('An error occurred while getting chat sessions', status_code=500)
 
 
 @support_bp.route('/chat/sessions/<session_id>', methods=['GET'])
-@jwt_required()
-@permission_required('support', 'read')
+@auth_required('support', 'read')
 def get_chat_session(session_id):
     """Get chat session by ID."""
     try:
-        # Find chat session
-        session = ChatSession.query.get(session_id)
-        if not session:
+        # Find chat session version
+        version = db.session.query(ChatSession.updated_at).filter_by(id=session_id).first()
+        if not version:
             raise NotFoundError('Chat session not found')
         
-        # Return chat session
-        return success_response(chat_session_schema.dump(session))
+        # Return chat session, or 304 when the client's copy is current
+        return conditional_response(
+            entity_etag(session_id, version.updated_at),
+            lambda: success_response(fast_dump(chat_session_schema, ChatSession.query.get(session_id)))
+        )
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -511,12 +611,12 @@ def get_chat_session(session_id):
 
 
 @support_bp.route('/chat/sessions', methods=['POST'])
-@jwt_required()
+@auth_required()
 def create_chat_session():
     """Create a new chat session."""
     try:
         # Get current user ID from token
-        current_user_id = get_jwt_identity()
+        current_user_id = g.user_id
         
         # Validate request data
         data = chat_session_schema.load(request.json)
@@ -530,7 +630,7 @@ def create_chat_session():
         db.session.commit()
         
         # Return created chat session
-        return success_response(chat_session_schema.dump(data), 'Chat session created successfully', status_code=201)
+        return success_response(fast_dump(chat_session_schema, data), 'Chat session created successfully', status_code=201)
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -541,21 +641,32 @@ def create_chat_session():
 
 
 @support_bp.route('/chat/sessions/<session_id>/messages', methods=['GET'])
-@jwt_required()
-@permission_required('support', 'read')
+@auth_required('support', 'read')
 def get_chat_messages(session_id):
     """Get chat messages for a session."""
     try:
-        # Find chat session
-        session = ChatSession.query.get(session_id)
-        if not session:
-            raise NotFoundError('Chat session not found')
-        
-        # Get chat messages
-        messages = ChatMessage.query.filter_by(session_id=session_id).order_by(ChatMessage.created_at).all()
-        
-        # Return chat messages
-        return success_response(chat_messages_schema.dump(messages))
+        # Get chat messages through a server-side cursor
+        messages = db.session.execute(
+            select(ChatMessage)
+            .filter_by(session_id=session_id)
+            .order_by(ChatMessage.created_at)
+            .execution_options(yield_per=200)
+        ).scalars()
+        
+        # Only check the session when there are no messages to imply it exists
+        first_message = next(messages, None)
+        if first_message is None:
+            session_exists = db.session.query(ChatSession.query.filter_by(id=session_id).exists()).scalar()
+            if not session_exists:
+                raise NotFoundError('Chat session not found')
+            
+            return success_response([])
+        
+        # Return chat messages, streamed as they are serialized
+        return stream_list_response(
+            chain([first_message], messages),
+            get_dump_function(chat_message_schema)
+        )
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -566,36 +677,51 @@ def get_chat_messages(session_id):
 
 
 @support_bp.route('/chat/sessions/<session_id>/messages', methods=['POST'])
-@jwt_required()
+@auth_required()
 def send_chat_message(session_id):
     """Send a chat message."""
     try:
         # Get current user ID from token
-        current_user_id = get_jwt_identity()
-        
-        # Find chat session
-        session = ChatSession.query.get(session_id)
-        if not session:
-            raise NotFoundError('Chat session not found')
-        
-        # Check if session is open
-        if session.status != 'open':
-            raise APIValidationError('Chat session is not open')
+        current_user_id = g.user_id
         
         # Validate request data
         data = chat_message_schema.load(request.json)
         
-        # Set session ID and sender ID
+        # Set session ID, sender ID and generated columns
+        data.id = str(uuid.uuid4())
         data.session_id = session_id
         data.sender_id = current_user_id
+        data.created_at = data.updated_at = datetime.utcnow()
+        
+        # Insert the message only if the session is open, checking and writing
+        # in one statement so the session can't close in between
+        open_session_row = select(
+            literal(data.id), ChatSession.id, literal(data.sender_id), literal(data.message),
+            literal(data.created_at), literal(data.updated_at)
+        ).where(ChatSession.id == session_id, ChatSession.status == 'open')
+        
+        _commit_without_wal_flush()
+        result = db.session.execute(
+            insert(ChatMessage).from_select(
+                ['id', 'session_id', 'sender_id', 'message', 'created_at', 'updated_at'],
+                open_session_row
+            )
+        )
+        
+        # Nothing inserted means the session is missing or not open
+        if result.rowcount == 0:
+            db.session.rollback()
+            session_exists = db.session.query(ChatSession.query.filter_by(id=session_id).exists()).scalar()
+            if not session_exists:
+                raise NotFoundError('Chat session not found')
+            
+            raise APIValidationError('Chat session is not open')
         
-        # Save to database
-        db.session.add(data)
         db.session.commit()
         
         # Return success message
         return success_response(
-            chat_message_schema.dump(data),
+            fast_dump(chat_message_schema, data),
             'Message sent successfully',
             status_code=201
         )
@@ -615,24 +741,28 @@ def send_chat_message(session_id):
 
 
 @support_bp.route('/chat/sessions/<session_id>/close', methods=['POST'])
-@jwt_required()
+@auth_required()
 def close_chat_session(session_id):
     """Close a chat session."""
     try:
-        # Find chat session
-        session = ChatSession.query.get(session_id)
-        if not session:
-            raise NotFoundError('Chat session not found')
+        # Close session in a single conditional UPDATE
+        now = datetime.utcnow()
+        closed = ChatSession.query.filter(
+            ChatSession.id == session_id,
+            ChatSession.status != 'closed'
+        ).update({'status': 'closed', 'ended_at': now, 'updated_at': now}, synchronize_session=False)
+        db.session.commit()
         
-        # Check if session is already closed
-        if session.status == 'closed':
+        # Nothing updated means the session is missing or already closed
+        if not closed:
+            session_exists = db.session.query(
+                ChatSession.query.filter_by(id=session_id).exists()
+            ).scalar()
+            if not session_exists:
+                raise NotFoundError('Chat session not found')
+            
             return success_response(message='Chat session is already closed')
         
-        # Close session
-        session.status = 'closed'
-        session.ended_at = datetime.utcnow()
-        db.session.commit()
-        
         # Return success message
         return success_response(message='Chat session closed successfully')
     
@@ -1,11 +1,17 @@
 """
 Telemetry routes for the Starlink Platform API.
+
+Telemetry listings and stats filtered by organization_id select the samples
+taken while their device belonged to the organization, as recorded on each
+sample, rather than the samples of the devices it owns now.
 """
+import hashlib
 from datetime import datetime, timedelta
 from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 from sqlalchemy import func
+from sqlalchemy.orm import raiseload
 from src.models import db
 from src.models.device import Device
 from src.models.organization import Organization
@@ -13,15 +19,55 @@ from src.models.telemetry import UserTerminalTelemetry, RouterTelemetry, Alert
 from src.schemas.telemetry import (
     user_terminal_telemetry_schema, user_terminal_telemetries_schema,
     router_telemetry_schema, router_telemetries_schema,
-    alert_schema, alerts_schema
+    alert_schema, alerts_schema, telemetry_query_schema
+)
+from src.utils.responses import (
+    success_response, error_response, pagination_response, keyset_pagination_response,
+    stream_list_response, entity_etag, conditional_response
 )
-from src.utils.responses import success_response, error_response, pagination_response
-from src.utils.error_handlers import NotFoundError
+from src.utils.error_handlers import NotFoundError, ValidationError as APIValidationError
 from src.utils.auth import permission_required
-from src.utils.starlink_api import StarlinkAPI
+from src.utils.pagination import keyset_paginate, offset_paginate
+from src.utils.cache import cached_json, cached_response, request_cache_key
+from src.utils.schema_jit import fast_dump, get_dump_function, compile_schemas
+from src.utils.telemetry_sync import start_sync_job, get_sync_job
 
 telemetry_bp = Blueprint('telemetry', __name__)
 
+compile_schemas(user_terminal_telemetries_schema, router_telemetries_schema, alerts_schema)
+
+# How long clients may reuse a telemetry listing before revalidating it
+TELEMETRY_MAX_AGE = 5
+
+# Bytes in a gibibyte, the unit of the usage stats' *_gb fields
+BYTES_PER_GIB = 1024 ** 3
+
+
+def _dumped_columns(model, schema):
+    """Get the model columns a schema dumps, in field order."""
+    return [getattr(model, field.attribute or name) for name, field in schema.dump_fields.items()]
+
+
+# Telemetry listings select just the dumped columns as plain rows, which the
+# compiled dump functions read like model instances, so no ORM objects are
+# built per sample
+_USER_TERMINAL_COLUMNS = _dumped_columns(UserTerminalTelemetry, user_terminal_telemetries_schema)
+_ROUTER_COLUMNS = _dumped_columns(RouterTelemetry, router_telemetries_schema)
+
+
+def _telemetry_etag(query, time_column):
+    """
+    Build the ETag of a telemetry listing from its query parameters and the
+    time and number of the matching samples.
+    
+    Syncs store whole stream windows, so samples older than the newest one
+    can still arrive; counting them catches those as well.
+    """
+    latest, count = query.with_entities(func.max(time_column), func.count()).one()
+    parameters = hashlib.sha1(request_cache_key('').encode('utf-8')).hexdigest()
+    return entity_etag(f"{parameters}-{count}", latest)
+
+
 @telemetry_bp.route('/user-terminals', methods=['GET'])
 @jwt_required()
 @permission_required('telemetry', 'read')
@@ -29,41 +75,41 @@ def get_user_terminal_telemetry():
     """Get user terminal telemetry data."""
     try:
         # Get query parameters
-        device_id = request.args.get('device_id')
-        organization_id = request.args.get('organization_id')
-        start_time = request.args.get('start_time')
-        end_time = request.args.get('end_time')
-        limit = min(request.args.get('limit', 100, type=int), 1000)
+        args = telemetry_query_schema.load(request.args)
+        limit = args['limit']
         
-        # Build query
-        query = UserTerminalTelemetry.query
+        # Build query over the dumped columns
+        query = db.session.query(*_USER_TERMINAL_COLUMNS)
         
         # Apply filters
-        if device_id:
-            query = query.filter_by(device_id=device_id)
-        
-        if organization_id:
-            query = query.join(Device).filter(Device.organization_id == organization_id)
-        
-        if start_time:
-            try:
-                start_datetime = datetime.fromisoformat(start_time)
-                query = query.filter(UserTerminalTelemetry.time >= start_datetime)
-            except ValueError:
-                return error_response('Invalid start_time format. Use ISO format (YYYY-MM-DDTHH:MM:SS)', status_code=400)
-        
-        if end_time:
-            try:
-                end_datetime = datetime.fromisoformat(end_time)
-                query = query.filter(UserTerminalTelemetry.time <= end_datetime)
-            except ValueError:
-                return error_response('Invalid end_time format. Use ISO format (YYYY-MM-DDTHH:MM:SS)', status_code=400)
-        
-        # Order by time descending and limit results
-        telemetry_data = query.order_by(UserTerminalTelemetry.time.desc()).limit(limit).all()
-        
-        # Return telemetry data
-        return success_response(user_terminal_telemetries_schema.dump(telemetry_data))
+        if args.get('device_id'):
+            query = query.filter(UserTerminalTelemetry.device_id == args['device_id'])
+        
+        if args.get('organization_id'):
+            query = query.filter(UserTerminalTelemetry.organization_id == args['organization_id'])
+        
+        if 'start_time' in args:
+            query = query.filter(UserTerminalTelemetry.time >= args['start_time'])
+        
+        if 'end_time' in args:
+            query = query.filter(UserTerminalTelemetry.time <= args['end_time'])
+        
+        # Order by time descending and limit results, fetching rows from a
+        # server-side cursor as they are written out
+        def build():
+            telemetry_data = iter(query.order_by(UserTerminalTelemetry.time.desc()).limit(limit).yield_per(200))
+            return stream_list_response(telemetry_data, get_dump_function(user_terminal_telemetries_schema))
+        
+        # Return telemetry data, streamed as it is serialized, or 304 Not
+        # Modified when no sample has arrived since the client's copy
+        return conditional_response(
+            _telemetry_etag(query, UserTerminalTelemetry.time),
+            build,
+            max_age=TELEMETRY_MAX_AGE
+        )
+    
+    except ValidationError as e:
+        return error_response('Invalid query parameters', errors=e.messages)
     
     except Exception as e:
         current_app.logger.error(f"Get user terminal telemetry error: {str(e)}")
@@ -77,41 +123,41 @@ def get_router_telemetry():
     """Get router telemetry data."""
     try:
         # Get query parameters
-        device_id = request.args.get('device_id')
-        organization_id = request.args.get('organization_id')
-        start_time = request.args.get('start_time')
-        end_time = request.args.get('end_time')
-        limit = min(request.args.get('limit', 100, type=int), 1000)
+        args = telemetry_query_schema.load(request.args)
+        limit = args['limit']
         
-        # Build query
-        query = RouterTelemetry.query
+        # Build query over the dumped columns
+        query = db.session.query(*_ROUTER_COLUMNS)
         
         # Apply filters
-        if device_id:
-            query = query.filter_by(device_id=device_id)
-        
-        if organization_id:
-            query = query.join(Device).filter(Device.organization_id == organization_id)
-        
-        if start_time:
-            try:
-                start_datetime = datetime.fromisoformat(start_time)
-                query = query.filter(RouterTelemetry.time >= start_datetime)
-            except ValueError:
-                return error_response('Invalid start_time format. Use ISO format (YYYY-MM-DDTHH:MM:SS)', status_code=400)
-        
-        if end_time:
-            try:
-                end_datetime = datetime.fromisoformat(end_time)
-                query = query.filter(RouterTelemetry.time <= end_datetime)
-            except ValueError:
-                return error_response('Invalid end_time format. Use ISO format (YYYY-MM-DDTHH:MM:SS)', status_code=400)
-        
-        # Order by time descending and limit results
-        telemetry_data = query.order_by(RouterTelemetry.time.desc()).limit(limit).all()
-        
-        # Return telemetry data
-        return success_response(router_telemetries_schema.dump(telemetry_data))
+        if args.get('device_id'):
+            query = query.filter(RouterTelemetry.device_id == args['device_id'])
+        
+        if args.get('organization_id'):
+            query = query.filter(RouterTelemetry.organization_id == args['organization_id'])
+        
+        if 'start_time' in args:
+            query = query.filter(RouterTelemetry.time >= args['start_time'])
+        
+        if 'end_time' in args:
+            query = query.filter(RouterTelemetry.time <= args['end_time'])
+        
+        # Order by time descending and limit results, fetching rows from a
+        # server-side cursor as they are written out
+        def build():
+            telemetry_data = iter(query.order_by(RouterTelemetry.time.desc()).limit(limit).yield_per(200))
+            return stream_list_response(telemetry_data, get_dump_function(router_telemetries_schema))
+        
+        # Return telemetry data, streamed as it is serialized, or 304 Not
+        # Modified when no sample has arrived since the client's copy
+        return conditional_response(
+            _telemetry_etag(query, RouterTelemetry.time),
+            build,
+            max_age=TELEMETRY_MAX_AGE
+        )
+    
+    except ValidationError as e:
+        return error_response('Invalid query parameters', errors=e.messages)
     
     except Exception as e:
         current_app.logger.error(f"Get router telemetry error: {str(e)}")
@@ -131,9 +177,10 @@ def get_alerts():
         severity = request.args.get('severity')
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)
+        include_total = request.args.get('include_total', 0, type=int)
         
-        # Build query
-        query = Alert.query
+        # Build query; schemas only dump device_id, so refuse lazy loads
+        query = Alert.query.options(raiseload('*'))
         
         # Apply filters
         if device_id:
@@ -148,17 +195,32 @@ def get_alerts():
         if severity:
             query = query.filter_by(severity=severity)
         
-        # Query alerts with pagination
-        pagination = query.order_by(Alert.start_time.desc()).paginate(page=page, per_page=per_page)
+        # Page by position when a cursor is given, avoiding OFFSET and COUNT
+        if 'cursor' in request.args:
+            alerts, next_cursor = keyset_paginate(
+                query, Alert, request.args['cursor'], per_page, sort_column=Alert.start_time
+            )
+            return keyset_pagination_response(fast_dump(alerts_schema, alerts), per_page, next_cursor)
+        
+        # Query alerts with pagination, probing for a next page instead of
+        # counting unless the total is asked for
+        alerts, has_more = offset_paginate(
+            query.order_by(Alert.start_time.desc(), Alert.id.desc()), page, per_page
+        )
+        total = query.count() if include_total else None
         
         # Return paginated alerts
         return pagination_response(
-            alerts_schema.dump(pagination.items),
+            fast_dump(alerts_schema, alerts),
             page,
             per_page,
-            pagination.total
+            total=total,
+            has_more=has_more
         )
     
+    except APIValidationError as e:
+        return error_response(e.message)
+    
     except Exception as e:
         current_app.logger.error(f"Get alerts error: {str(e)}")
         return error_response('An error occurred while getting alerts', status_code=500)
@@ -167,6 +229,7 @@ def get_alerts():
 @telemetry_bp.route('/alerts/<alert_id>', methods=['GET'])
 @jwt_required()
 @permission_required('telemetry', 'read')
+@cached_json(lambda alert_id: f"alert:{alert_id}", timeout=30)
 def get_alert(alert_id):
     """Get alert by ID."""
     try:
@@ -176,7 +239,7 @@ def get_alert(alert_id):
             raise NotFoundError('Alert not found')
         
         # Return alert
-        return success_response(alert_schema.dump(alert))
+        return success_response(fast_dump(alert_schema, alert))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -190,7 +253,7 @@ def get_alert(alert_id):
 @jwt_required()
 @permission_required('telemetry', 'create')
 def sync_telemetry():
-    """Sync telemetry data from Starlink API."""
+    """Queue a telemetry sync from Starlink API."""
     try:
         # Get request data
         data = request.json
@@ -199,58 +262,46 @@ def sync_telemetry():
         if not account_number:
             return error_response('Account number is required', status_code=400)
         
-        # Initialize Starlink API client
-        starlink_api = StarlinkAPI()
-        
-        # Get telemetry data from Starlink API
-        telemetry_data = starlink_api.get_telemetry(account_number)
-        if not telemetry_data:
-            return error_response('Failed to get telemetry data from Starlink API', status_code=500)
-        
-        # Process telemetry data
-        processed_data = starlink_api.process_telemetry_data(telemetry_data)
-        if not processed_data:
-            return error_response('Failed to process telemetry data', status_code=500)
-        
-        # Extract data
-        data_rows = processed_data['data']
-        metadata = processed_data['metadata']
-        
-        # Process each row of data
-        user_terminal_count = 0
-        router_count = 0
-        ip_allocation_count = 0
-        
-        for row in data_rows:
-            device_type = row.get('DeviceType')
-            
-            if device_type == 'u':  # User Terminal
-                # Process user terminal telemetry
-                user_terminal_count += 1
-            
-            elif device_type == 'r':  # Router
-                # Process router telemetry
-                router_count += 1
-            
-            elif device_type == 'i':  # IP Allocation
-                # Process IP allocation
-                ip_allocation_count += 1
-        
-        # Return success message
+        # Hand the sync to a background worker
+        job_id = start_sync_job(account_number)
+        
+        # Return the job to poll
         return success_response({
-            'user_terminal_count': user_terminal_count,
-            'router_count': router_count,
-            'ip_allocation_count': ip_allocation_count
-        }, 'Telemetry data synced successfully')
+            'job_id': job_id,
+            'status': 'queued'
+        }, 'Telemetry sync started', status_code=202)
     
     except Exception as e:
         current_app.logger.error(f"Sync telemetry error: {str(e)}")
         return error_response('An error occurred while syncing telemetry data', status_code=500)
 
 
+@telemetry_bp.route('/sync/<job_id>', methods=['GET'])
+@jwt_required()
+@permission_required('telemetry', 'create')
+def get_sync_status(job_id):
+    """Get the status of a telemetry sync."""
+    try:
+        # Find sync job
+        job = get_sync_job(job_id)
+        if not job:
+            raise NotFoundError('Sync job not found')
+        
+        # Return sync job
+        return success_response(job)
+    
+    except NotFoundError as e:
+        return error_response(e.message, status_code=404)
+    
+    except Exception as e:
+        current_app.logger.error(f"Get sync status error: {str(e)}")
+        return error_response('An error occurred while getting sync status', status_code=500)
+
+
 @telemetry_bp.route('/stats/usage', methods=['GET'])
 @jwt_required()
 @permission_required('telemetry', 'read')
+@cached_response(lambda: request_cache_key('telemetry:usage:'), policy='normal')
 def get_usage_stats():
     """Get usage statistics."""
     try:
@@ -284,7 +335,7 @@ def get_usage_stats():
             query = query.filter(RouterTelemetry.device_id == device_id)
         
         if organization_id:
-            query = query.join(Device).filter(Device.organization_id == organization_id)
+            query = query.filter(RouterTelemetry.organization_id == organization_id)
         
         # Filter by time range
         query = query.filter(RouterTelemetry.time.between(start_time, end_time))
@@ -292,16 +343,12 @@ def get_usage_stats():
         # Execute query
         result = query.first()
         
-        # Calculate total usage
-        total_tx_bytes = result.total_tx_bytes or 0
-        total_rx_bytes = result.total_rx_bytes or 0
+        # Calculate total usage; Postgres sums bigints as numeric, which
+        # would otherwise be encoded as floats
+        total_tx_bytes = int(result.total_tx_bytes or 0)
+        total_rx_bytes = int(result.total_rx_bytes or 0)
         total_bytes = total_tx_bytes + total_rx_bytes
         
-        # Convert to GB
-        total_tx_gb = total_tx_bytes / (1024 * 1024 * 1024)
-        total_rx_gb = total_rx_bytes / (1024 * 1024 * 1024)
-        total_gb = total_bytes / (1024 * 1024 * 1024)
-        
         # Return usage statistics
         return success_response({
             'period': period,
@@ -310,9 +357,9 @@ def get_usage_stats():
             'upload_bytes': total_tx_bytes,
             'download_bytes': total_rx_bytes,
             'total_bytes': total_bytes,
-            'upload_gb': round(total_tx_gb, 2),
-            'download_gb': round(total_rx_gb, 2),
-            'total_gb': round(total_gb, 2)
+            'upload_gb': round(total_tx_bytes / BYTES_PER_GIB, 2),
+            'download_gb': round(total_rx_bytes / BYTES_PER_GIB, 2),
+            'total_gb': round(total_bytes / BYTES_PER_GIB, 2)
         })
     
     except Exception as e:
@@ -323,6 +370,7 @@ def get_usage_stats():
 @telemetry_bp.route('/stats/performance', methods=['GET'])
 @jwt_required()
 @permission_required('telemetry', 'read')
+@cached_response(lambda: request_cache_key('telemetry:performance:'), policy='long')
 def get_performance_stats():
     """Get performance statistics."""
     try:
@@ -360,7 +408,7 @@ def get_performance_stats():
             query = query.filter(UserTerminalTelemetry.device_id == device_id)
         
         if organization_id:
-            query = query.join(Device).filter(Device.organization_id == organization_id)
+            query = query.filter(UserTerminalTelemetry.organization_id == organization_id)
         
         # Filter by time range
         query = query.filter(UserTerminalTelemetry.time.between(start_time, end_time))
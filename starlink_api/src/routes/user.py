@@ -4,15 +4,32 @@ User routes for the Starlink Platform API.
 from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy.orm import load_only, raiseload
 from src.models import db
 from src.models.user import User, Role, UserRole
 from src.schemas.user import user_schema, users_schema, user_update_schema
 from src.utils.responses import success_response, error_response, pagination_response
 from src.utils.error_handlers import NotFoundError, ValidationError as APIValidationError
 from src.utils.auth import admin_required, permission_required
+from src.utils.pagination import offset_paginate
+from src.utils.cache import cached_json, invalidate
+from src.utils.schema_jit import fast_dump, compile_schemas
 
 user_bp = Blueprint('user', __name__)
 
+compile_schemas(user_schema)
+
+# Load only the columns the user schema dumps, leaving out the password
+# hash and tokens, and refuse lazy loads
+_USER_LOAD_OPTIONS = (
+    load_only(
+        User.id, User.email, User.first_name, User.last_name, User.phone, User.last_login,
+        User.is_active, User.is_verified, User.created_at, User.updated_at
+    ),
+    raiseload('*')
+)
+
+
 @user_bp.route('', methods=['GET'])
 @jwt_required()
 @permission_required('user', 'read')
@@ -23,15 +40,21 @@ def get_users():
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)
         
-        # Query users with pagination
-        pagination = User.query.paginate(page=page, per_page=per_page)
+        include_total = request.args.get('include_total', 0, type=int)
+        
+        # Query users with pagination, probing for a next page instead of
+        # counting unless the total is asked for
+        query = User.query.options(*_USER_LOAD_OPTIONS)
+        users, has_more = offset_paginate(query, page, per_page)
+        total = query.count() if include_total else None
         
         # Return paginated users
         return pagination_response(
-            users_schema.dump(pagination.items),
+            fast_dump(users_schema, users),
             page,
             per_page,
-            pagination.total
+            total=total,
+            has_more=has_more
         )
     
     except Exception as e:
@@ -42,16 +65,17 @@ def get_users():
 @user_bp.route('/<user_id>', methods=['GET'])
 @jwt_required()
 @permission_required('user', 'read')
+@cached_json(lambda user_id: f"user:{user_id}", timeout=300)
 def get_user(user_id):
     """Get user by ID."""
     try:
         # Find user
-        user = User.query.get(user_id)
+        user = User.query.options(*_USER_LOAD_OPTIONS).filter_by(id=user_id).first()
         if not user:
             raise NotFoundError('User not found')
         
         # Return user
-        return success_response(user_schema.dump(user))
+        return success_response(fast_dump(user_schema, user))
     
     except NotFoundError as e:
         return error_response(str(e), status_code=404)
@@ -79,7 +103,7 @@ def create_user():
         db.session.commit()
         
         # Return created user
-        return success_response(user_schema.dump(data), 'User created successfully', status_code=201)
+        return success_response(fast_dump(user_schema, data), 'User created successfully', status_code=201)
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -115,9 +139,10 @@ def update_user(user_id):
         
         # Save changes to database
         db.session.commit()
+        invalidate(f"user:{user_id}")
         
         # Return updated user
-        return success_response(user_schema.dump(data), 'User updated successfully')
+        return success_response(fast_dump(user_schema, data), 'User updated successfully')
     
     except ValidationError as e:
         return error_response('Validation error', errors=e.messages)
@@ -144,6 +169,7 @@ def delete_user(user_id):
         # Delete user from database
         db.session.delete(user)
         db.session.commit()
+        invalidate(f"user:{user_id}")
         
         # Return success message
         return success_response(message='User deleted successfully')
@@ -162,24 +188,27 @@ def delete_user(user_id):
 def get_user_roles(user_id):
     """Get user roles."""
     try:
-        # Find user
-        user = User.query.get(user_id)
-        if not user:
+        # Find user along with their roles in a single query; a user without
+        # roles comes back as one row of nulls
+        user_roles = db.session.query(Role.id, Role.name, Role.description, UserRole.organization_id) \
+            .select_from(User) \
+            .outerjoin(UserRole, UserRole.user_id == User.id) \
+            .outerjoin(Role, Role.id == UserRole.role_id) \
+            .filter(User.id == user_id) \
+            .all()
+        if not user_roles:
             raise NotFoundError('User not found')
         
-        # Get user roles
-        user_roles = UserRole.query.filter_by(user_id=user_id).all()
-        roles = []
-        
-        for user_role in user_roles:
-            role = Role.query.get(user_role.role_id)
-            if role:
-                roles.append({
-                    'id': role.id,
-                    'name': role.name,
-                    'description': role.description,
-                    'organization_id': user_role.organization_id
-                })
+        roles = [
+            {
+                'id': role_id,
+                'name': name,
+                'description': description,
+                'organization_id': organization_id
+            }
+            for role_id, name, description, organization_id in user_roles
+            if role_id is not None
+        ]
         
         # Return user roles
         return success_response(roles)
@@ -100,12 +100,14 @@ class ChatMessageSchema(ma.SQLAlchemySchema):
 # Initialize schemas
 ticket_schema = TicketSchema()
 tickets_schema = TicketSchema(many=True)
+ticket_list_schema = TicketSchema(many=True, exclude=('description',))
 ticket_comment_schema = TicketCommentSchema()
 ticket_comments_schema = TicketCommentSchema(many=True)
 kb_category_schema = KbCategorySchema()
 kb_categories_schema = KbCategorySchema(many=True)
 kb_article_schema = KbArticleSchema()
 kb_articles_schema = KbArticleSchema(many=True)
+kb_article_list_schema = KbArticleSchema(many=True, exclude=('content',))
 chat_session_schema = ChatSessionSchema()
 chat_sessions_schema = ChatSessionSchema(many=True)
 chat_message_schema = ChatMessageSchema()
@@ -1,7 +1,7 @@
 """
 Telemetry-related schemas for the Starlink Platform API.
 """
-from marshmallow import fields
+from marshmallow import Schema, fields, validate, EXCLUDE
 from src.models import ma
 from src.models.telemetry import UserTerminalTelemetry, RouterTelemetry, Alert
 
@@ -66,6 +66,18 @@ class AlertSchema(ma.SQLAlchemySchema):
     updated_at = fields.DateTime(dump_only=True)
 
 
+class TelemetryQuerySchema(Schema):
+    """Telemetry listing query parameters schema."""
+    class Meta:
+        unknown = EXCLUDE
+    
+    device_id = fields.String()
+    organization_id = fields.String()
+    start_time = fields.DateTime()
+    end_time = fields.DateTime()
+    limit = fields.Integer(load_default=100, validate=validate.Range(min=1, max=1000))
+
+
 # Initialize schemas
 user_terminal_telemetry_schema = UserTerminalTelemetrySchema()
 user_terminal_telemetries_schema = UserTerminalTelemetrySchema(many=True)
@@ -73,4 +85,5 @@ router_telemetry_schema = RouterTelemetrySchema()
 router_telemetries_schema = RouterTelemetrySchema(many=True)
 alert_schema = AlertSchema()
 alerts_schema = AlertSchema(many=True)
+telemetry_query_schema = TelemetryQuerySchema()
 
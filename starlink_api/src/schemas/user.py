@@ -5,6 +5,10 @@ from marshmallow import Schema, fields, validate, post_load
 from src.models import ma
 from src.models.user import User, Role, Permission, RolePermission, UserRole
 
+# Password rule shared by the user schemas
+_PASSWORD_LENGTH = validate.Length(min=8)
+
+
 class UserSchema(ma.SQLAlchemySchema):
     """User schema."""
     class Meta:
@@ -13,7 +17,7 @@ class UserSchema(ma.SQLAlchemySchema):
     
     id = ma.auto_field(dump_only=True)
     email = fields.Email(required=True)
-    password = fields.String(required=True, load_only=True, validate=validate.Length(min=8))
+    password = fields.String(required=True, load_only=True, validate=_PASSWORD_LENGTH)
     first_name = fields.String()
     last_name = fields.String()
     phone = fields.String()
@@ -32,7 +36,7 @@ class UserUpdateSchema(ma.SQLAlchemySchema):
         partial = True
     
     email = fields.Email()
-    password = fields.String(load_only=True, validate=validate.Length(min=8))
+    password = fields.String(load_only=True, validate=_PASSWORD_LENGTH)
     first_name = fields.String()
     last_name = fields.String()
     phone = fields.String()
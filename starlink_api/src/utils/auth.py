@@ -2,11 +2,198 @@
 Authentication utilities for the Starlink Platform API.
 """
 import os
+import threading
+import time
+import jwt
+import redis
 import requests
 from functools import wraps
-from flask import request, jsonify, current_app
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import request, current_app, g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from flask_jwt_extended.config import config as jwt_config
+from src.models import db
 from src.models.user import User, Role, Permission, UserRole, RolePermission
+from src.utils.cache import get_redis
+from src.utils.responses import message_response
+
+# Permission catalogue. A permission's position in this list determines its
+# bit in the JWT permissions claim, so new entries must only be appended.
+PERMISSIONS = [
+    # User management
+    ('user', 'create'),
+    ('user', 'read'),
+    ('user', 'update'),
+    ('user', 'delete'),
+    
+    # Organization management
+    ('organization', 'create'),
+    ('organization', 'read'),
+    ('organization', 'update'),
+    ('organization', 'delete'),
+    
+    # Device management
+    ('device', 'create'),
+    ('device', 'read'),
+    ('device', 'update'),
+    ('device', 'delete'),
+    
+    # Telemetry
+    ('telemetry', 'read'),
+    ('telemetry', 'sync'),
+    
+    # Support
+    ('support', 'create'),
+    ('support', 'read'),
+    ('support', 'update'),
+    ('support', 'delete'),
+    
+    # Notification
+    ('notification', 'create'),
+    ('notification', 'read'),
+    ('notification', 'update'),
+    ('notification', 'delete'),
+]
+
+# Bit 0 is reserved for the Super Admin role
+SUPER_ADMIN_BIT = 1
+
+PERMISSION_BITS = {}
+for _index, (_resource, _action) in enumerate(PERMISSIONS, start=1):
+    PERMISSION_BITS.setdefault(_resource, {})[_action] = 1 << _index
+
+# Name of the JWT claim carrying the permissions bitmask
+PERMISSIONS_CLAIM = 'perms'
+
+# Shared session for Starlink API calls, so requests reuse pooled keep-alive
+# connections instead of a new TLS handshake each. Only failed connection
+# attempts are retried, since those never reached the server.
+starlink_session = requests.Session()
+starlink_session.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+))
+
+# Connect and read timeouts of Starlink API calls, in seconds
+STARLINK_TIMEOUT = (3.05, 10)
+
+# Starlink access tokens are shared by all clients in the process, and
+# between worker processes through Redis, and refreshed this many seconds
+# before they expire
+STARLINK_TOKEN_MARGIN = 60
+STARLINK_TOKEN_KEY = 'starlink:access_token'
+_starlink_token = {'value': None, 'expires_at': 0}
+_starlink_token_lock = threading.Lock()
+
+# Permissions bitmask of each role by role ID, loaded on first use
+_role_masks = None
+
+
+def load_role_masks():
+    """Resolve the permissions bitmask of every role with a single query."""
+    rows = db.session.query(Role.id, Role.name, Permission.resource, Permission.action) \
+        .select_from(Role) \
+        .outerjoin(RolePermission, RolePermission.role_id == Role.id) \
+        .outerjoin(Permission, Permission.id == RolePermission.permission_id) \
+        .all()
+    
+    masks = {}
+    for role_id, role_name, resource, action in rows:
+        mask = masks.get(role_id, 0)
+        if role_name == 'Super Admin':
+            mask |= SUPER_ADMIN_BIT
+        if resource:
+            mask |= PERMISSION_BITS.get(resource, {}).get(action, 0)
+        masks[role_id] = mask
+    
+    return masks
+
+
+def warm_role_masks():
+    """Load the bitmasks of all roles ahead of the first permission check."""
+    global _role_masks
+    _role_masks = load_role_masks()
+
+
+def clear_role_masks():
+    """Drop the loaded role bitmasks after role permissions have changed."""
+    global _role_masks
+    _role_masks = None
+
+
+def get_role_mask(role_id):
+    """
+    Resolve the permissions bitmask granted by a role.
+    
+    Role permissions only change when roles are re-initialized, so the masks
+    of all roles are loaded together and kept per process; init_db clears
+    them after syncing roles. A role missing from the loaded masks triggers
+    a reload.
+    """
+    masks = _role_masks
+    if masks is None or role_id not in masks:
+        warm_role_masks()
+        masks = _role_masks
+    
+    return masks.get(role_id, 0)
+
+
+def get_permissions_mask(user_id):
+    """Resolve the permissions bitmask for a user from their roles."""
+    role_ids = db.session.query(UserRole.role_id).filter(UserRole.user_id == user_id).distinct()
+    
+    mask = 0
+    for (role_id,) in role_ids:
+        mask |= get_role_mask(role_id)
+    
+    return mask
+
+
+def get_current_permissions_mask():
+    """
+    Get the permissions bitmask of the verified JWT.
+    
+    The mask is baked into the token at issue time, so role changes take
+    effect when the token is refreshed. Tokens issued without the claim
+    fall back to a database lookup. Either way the mask is resolved once
+    per request and kept on g for later checks.
+    """
+    mask = g.get('permissions_mask')
+    
+    if mask is None:
+        claims = g.get('jwt_claims')
+        if claims is None:
+            claims = get_jwt()
+        
+        mask = claims.get(PERMISSIONS_CLAIM)
+        if mask is None:
+            # Identities loaded by load_request_identity are kept on g, as
+            # its fast path leaves flask_jwt_extended's context unset
+            user_id = g.get('user_id')
+            if user_id is None:
+                user_id = get_jwt_identity()
+            mask = get_permissions_mask(user_id)
+        g.permissions_mask = mask
+    
+    return mask
+
+
+def ensure_jwt_verified():
+    """
+    Verify the request's JWT unless it was already verified for this
+    request, as it is when routes stack these decorators under
+    @jwt_required().
+    """
+    try:
+        verified = bool(get_jwt())
+    except RuntimeError:
+        verified = False
+    
+    if not verified:
+        verify_jwt_in_request()
+
 
 def token_required(f):
     """Decorator to verify JWT token."""
@@ -16,7 +203,7 @@ def token_required(f):
             verify_jwt_in_request()
             return f(*args, **kwargs)
         except Exception as e:
-            return jsonify({'message': 'Token is invalid or expired'}), 401
+            return message_response('Token is invalid or expired', 401)
     return decorated
 
 
@@ -25,73 +212,198 @@ def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         try:
-            verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user_roles = UserRole.query.filter_by(user_id=user_id).all()
-            
-            for user_role in user_roles:
-                role = Role.query.get(user_role.role_id)
-                if role and role.name == 'Super Admin':
-                    return f(*args, **kwargs)
-            
-            return jsonify({'message': 'Admin privileges required'}), 403
+            ensure_jwt_verified()
+            mask = get_current_permissions_mask()
         except Exception as e:
-            return jsonify({'message': 'Token is invalid or expired'}), 401
+            return message_response('Token is invalid or expired', 401)
+        
+        if not mask & SUPER_ADMIN_BIT:
+            return message_response('Admin privileges required', 403)
+        
+        return f(*args, **kwargs)
     return decorated
 
 
 def permission_required(resource, action):
     """Decorator to verify permission."""
+    # Resolve the permission bit once, at decoration time
+    required_bit = PERMISSION_BITS.get(resource, {}).get(action, 0)
+    allowed_bits = SUPER_ADMIN_BIT | required_bit
+    
     def decorator(f):
         @wraps(f)
         def decorated(*args, **kwargs):
             try:
-                verify_jwt_in_request()
-                user_id = get_jwt_identity()
-                user_roles = UserRole.query.filter_by(user_id=user_id).all()
-                
-                # Check if user has Super Admin role
-                for user_role in user_roles:
-                    role = Role.query.get(user_role.role_id)
-                    if role and role.name == 'Super Admin':
-                        return f(*args, **kwargs)
-                
-                # Check if user has required permission
-                permission = Permission.query.filter_by(resource=resource, action=action).first()
-                if not permission:
-                    return jsonify({'message': 'Permission not found'}), 403
-                
-                for user_role in user_roles:
-                    role_permission = RolePermission.query.filter_by(
-                        role_id=user_role.role_id,
-                        permission_id=permission.id
-                    ).first()
-                    
-                    if role_permission:
-                        return f(*args, **kwargs)
-                
-                return jsonify({'message': 'Permission denied'}), 403
+                ensure_jwt_verified()
+                mask = get_current_permissions_mask()
             except Exception as e:
-                return jsonify({'message': 'Token is invalid or expired'}), 401
+                return message_response('Token is invalid or expired', 401)
+            
+            if mask & allowed_bits:
+                return f(*args, **kwargs)
+            
+            if not required_bit:
+                return message_response('Permission not found', 403)
+            
+            return message_response('Permission denied', 403)
         return decorated
     return decorator
 
 
-def get_starlink_access_token():
-    """Get access token from Starlink API."""
+def decode_bearer_token():
+    """
+    Decode the request's access token from its Authorization header with
+    PyJWT directly, using the JWT settings of the app.
+    
+    flask_jwt_extended decodes every token twice to support key loaders
+    this app doesn't use. Returns None for anything but a valid Bearer
+    access token, leaving verify_jwt_in_request to reject it.
+    """
+    if 'headers' not in jwt_config.token_location or not jwt_config.header_type:
+        return None
+    
+    header_type, _, token = request.headers.get(jwt_config.header_name, '').partition(' ')
+    if header_type != jwt_config.header_type or not token:
+        return None
+    
     try:
-        response = requests.post(
-            f"{current_app.config['STARLINK_API_URL']}/auth/connect/token",
-            headers={'Content-type': 'application/x-www-form-urlencoded'},
-            data={
-                'client_id': current_app.config['STARLINK_CLIENT_ID'],
-                'client_secret': current_app.config['STARLINK_CLIENT_SECRET'],
-                'grant_type': 'client_credentials',
+        claims = jwt.decode(
+            token,
+            jwt_config.decode_key,
+            algorithms=jwt_config.decode_algorithms,
+            audience=jwt_config.decode_audience,
+            issuer=jwt_config.decode_issuer,
+            leeway=jwt_config.leeway,
+            options={
+                'verify_aud': jwt_config.decode_audience is not None,
+                'verify_sub': jwt_config.verify_sub
             }
         )
-        response.raise_for_status()
-        return response.json().get('access_token')
-    except Exception as e:
-        current_app.logger.error(f"Failed to get Starlink access token: {str(e)}")
+    except jwt.PyJWTError:
         return None
+    
+    if claims.get('type', 'access') != 'access' or jwt_config.identity_claim_key not in claims:
+        return None
+    
+    return claims
+
+
+def load_request_identity():
+    """
+    Verify the request's JWT once and keep its claims on g.
+    
+    Meant to be registered as a blueprint before_request hook so handlers
+    guarded by auth_required don't decode the token again. Valid Bearer
+    tokens take the decode_bearer_token fast path; missing or invalid
+    tokens raise from verify_jwt_in_request and are answered by the JWT
+    error loaders. Methods exempt from JWT checks, such as CORS preflight
+    OPTIONS requests, pass through without an identity.
+    """
+    if request.method in jwt_config.exempt_methods:
+        return
+    
+    claims = decode_bearer_token()
+    if claims is None:
+        verify_jwt_in_request()
+        claims = get_jwt()
+    
+    g.jwt_claims = claims
+    g.user_id = claims[jwt_config.identity_claim_key]
+
+
+def auth_required(resource=None, action=None):
+    """
+    Decorator to verify permission against the identity loaded by
+    load_request_identity. Without a resource only the token is required.
+    """
+    required_bit = PERMISSION_BITS.get(resource, {}).get(action, 0)
+    allowed_bits = SUPER_ADMIN_BIT | required_bit
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if resource is None:
+                return f(*args, **kwargs)
+            
+            if get_current_permissions_mask() & allowed_bits:
+                return f(*args, **kwargs)
+            
+            if not required_bit:
+                return message_response('Permission not found', 403)
+            
+            return message_response('Permission denied', 403)
+        return decorated
+    return decorator
+
+
+def get_starlink_access_token():
+    """
+    Get access token from Starlink API.
+    
+    Tokens are cached until shortly before they expire, so concurrent
+    clients share one token instead of authenticating per call.
+    """
+    with _starlink_token_lock:
+        if _starlink_token['value'] and time.time() < _starlink_token['expires_at']:
+            return _starlink_token['value']
+        
+        # Reuse the token another worker process has fetched, if any
+        client = get_redis()
+        try:
+            pipe = client.pipeline()
+            pipe.get(STARLINK_TOKEN_KEY)
+            pipe.ttl(STARLINK_TOKEN_KEY)
+            shared_token, shared_ttl = pipe.execute()
+        except redis.RedisError as e:
+            current_app.logger.warning(f"Cache read error: {str(e)}")
+            shared_token = None
+        
+        if shared_token and shared_ttl > 0:
+            _starlink_token['value'] = shared_token.decode('utf-8')
+            _starlink_token['expires_at'] = time.time() + shared_ttl
+            return _starlink_token['value']
+        
+        try:
+            response = starlink_session.post(
+                f"{current_app.config['STARLINK_API_URL']}/auth/connect/token",
+                headers={'Content-type': 'application/x-www-form-urlencoded'},
+                data={
+                    'client_id': current_app.config['STARLINK_CLIENT_ID'],
+                    'client_secret': current_app.config['STARLINK_CLIENT_SECRET'],
+                    'grant_type': 'client_credentials',
+                },
+                timeout=STARLINK_TIMEOUT
+            )
+            response.raise_for_status()
+            token = response.json()
+        except Exception as e:
+            current_app.logger.error(f"Failed to get Starlink access token: {str(e)}")
+            return None
+        
+        # Tokens typically expire in 15 minutes
+        lifetime = max(token.get('expires_in', 900) - STARLINK_TOKEN_MARGIN, 1)
+        _starlink_token['value'] = token.get('access_token')
+        _starlink_token['expires_at'] = time.time() + lifetime
+        
+        if _starlink_token['value']:
+            try:
+                client.set(STARLINK_TOKEN_KEY, _starlink_token['value'], ex=lifetime)
+            except redis.RedisError as e:
+                current_app.logger.warning(f"Cache write error: {str(e)}")
+        
+        return _starlink_token['value']
+
+
+def invalidate_starlink_access_token(token):
+    """Drop a cached Starlink access token the API has rejected."""
+    with _starlink_token_lock:
+        if _starlink_token['value'] == token:
+            _starlink_token['value'] = None
+        
+        try:
+            client = get_redis()
+            if client.get(STARLINK_TOKEN_KEY) == token.encode('utf-8'):
+                client.delete(STARLINK_TOKEN_KEY)
+        except redis.RedisError as e:
+            current_app.logger.warning(f"Cache invalidation error: {str(e)}")
 
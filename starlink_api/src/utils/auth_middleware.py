@@ -5,9 +5,20 @@ from functools import wraps
 from flask import request, current_app, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
 from src.models import db
-from src.models.user import User, Role, Permission, UserRole
+from src.models.user import User, Role, Permission, UserRole, RolePermission
 from src.utils.responses import error_response
 
+def _load_user(user_id):
+    """
+    Get a user by ID, loading them at most once per request.
+    """
+    user = g.get('current_user')
+    if not isinstance(user, User) or user.id != user_id:
+        user = User.query.get(user_id)
+        g.current_user = user
+    
+    return user
+
 def jwt_required_with_refresh(fn):
     """
     Custom decorator that verifies JWT and handles token refresh.
@@ -21,13 +32,13 @@ def jwt_required_with_refresh(fn):
             # Get user ID from token
             user_id = get_jwt_identity()
             
-            # Get user from database
-            user = User.query.get(user_id)
+            # Get user from database, keeping it in g object for route handlers
+            user = _load_user(user_id)
             if not user:
                 return error_response('User not found', status_code=404)
             
-            # Store user in g object for route handlers
-            g.current_user = user
+            if not user.is_active:
+                return error_response('Account is disabled', status_code=403)
             
             # Continue to route handler
             return fn(*args, **kwargs)
@@ -51,11 +62,14 @@ def role_required(role_name):
                 # Get user ID from token
                 user_id = get_jwt_identity()
                 
-                # Get user roles from database
-                user_roles = db.session.query(Role).join(UserRole).filter(UserRole.user_id == user_id).all()
-                
                 # Check if user has the required role
-                if not any(role.name == role_name for role in user_roles):
+                has_role = db.session.query(
+                    db.session.query(UserRole.role_id)
+                    .join(Role, Role.id == UserRole.role_id)
+                    .filter(UserRole.user_id == user_id, Role.name == role_name)
+                    .exists()
+                ).scalar()
+                if not has_role:
                     return error_response('Insufficient permissions', status_code=403)
                 
                 # Continue to route handler
@@ -82,11 +96,19 @@ def permission_required(resource, action):
                 # Get user ID from token
                 user_id = get_jwt_identity()
                 
-                # Get user permissions from database
-                user_permissions = db.session.query(Permission).join(Role.permissions).join(UserRole).filter(UserRole.user_id == user_id).all()
-                
-                # Check if user has the required permission
-                if not any(p.resource == resource and p.action == action for p in user_permissions):
+                # Check if one of the user's roles grants the required permission
+                has_permission = db.session.query(
+                    db.session.query(UserRole.role_id)
+                    .join(RolePermission, RolePermission.role_id == UserRole.role_id)
+                    .join(Permission, Permission.id == RolePermission.permission_id)
+                    .filter(
+                        UserRole.user_id == user_id,
+                        Permission.resource == resource,
+                        Permission.action == action
+                    )
+                    .exists()
+                ).scalar()
+                if not has_permission:
                     return error_response('Insufficient permissions', status_code=403)
                 
                 # Continue to route handler
@@ -110,10 +132,8 @@ def get_current_user():
         # Get user ID from token
         user_id = get_jwt_identity()
         
-        # Get user from database
-        user = User.query.get(user_id)
-        
-        return user
+        # Get user, reusing the one already loaded for this request
+        return _load_user(user_id)
     except Exception:
         return None
 
@@ -0,0 +1,61 @@
+"""
+Service plan snapshot backfill for the Starlink Platform API.
+
+Organization service plan assignments store a snapshot of their service
+plan, which organization service plan listings return. Assignments stored
+before the column existed have it NULL; this script adds the column to
+existing databases and fills it from the assigned plans.
+
+Run it once after upgrading with:
+    python -m src.utils.backfill_service_plans
+"""
+from flask import current_app
+from sqlalchemy import text
+from src.models import db
+from src.models.organization import ServicePlan, OrganizationServicePlan
+from src.schemas.organization import service_plan_schema
+from src.utils.schema_jit import fast_dump
+
+
+def backfill_service_plan_snapshots():
+    """
+    Add and fill the service plan snapshot column of organization
+    service plan assignments.
+    
+    Only assignments without a snapshot are updated, so the backfill can be
+    re-run safely. Returns the number of updated assignments.
+    """
+    db.session.execute(text(
+        "ALTER TABLE organization_service_plans ADD COLUMN IF NOT EXISTS service_plan_snapshot json"
+    ))
+    
+    # Snapshot each assigned plan once, however many assignments it has
+    plans = ServicePlan.query.filter(
+        ServicePlan.id.in_(
+            db.session.query(OrganizationServicePlan.service_plan_id)
+            .filter(OrganizationServicePlan.service_plan_snapshot.is_(None))
+        )
+    )
+    
+    updated = 0
+    for plan in plans:
+        updated += db.session.execute(
+            OrganizationServicePlan.__table__.update()
+            .where(
+                OrganizationServicePlan.service_plan_id == plan.id,
+                OrganizationServicePlan.service_plan_snapshot.is_(None)
+            )
+            .values(service_plan_snapshot=fast_dump(service_plan_schema, plan))
+        ).rowcount
+    
+    db.session.commit()
+    
+    current_app.logger.info("Service plan snapshots backfilled: %d assignments", updated)
+    return updated
+
+
+if __name__ == '__main__':
+    from src.main import app
+    
+    with app.app_context():
+        backfill_service_plan_snapshots()
@@ -0,0 +1,67 @@
+"""
+Telemetry organization backfill for the Starlink Platform API.
+
+Telemetry samples record the organization owning their device when they
+were taken, and organization-scoped listings and stats filter on that
+column. Samples stored before the column existed have it NULL; this script
+adds the column and its index to existing databases and fills it from the
+samples' devices.
+
+Run it once after upgrading with:
+    python -m src.utils.backfill_telemetry
+"""
+from flask import current_app
+from sqlalchemy import text
+from src.models import db
+
+# Telemetry tables and the columns their organization index includes
+_TELEMETRY_TABLES = {
+    'user_terminal_telemetry': (
+        'downlink_throughput', 'uplink_throughput', 'ping_latency_ms_avg',
+        'ping_drop_rate_avg', 'obstruction_percent_time', 'signal_quality'
+    ),
+    'router_telemetry': ('wan_tx_bytes', 'wan_rx_bytes'),
+}
+
+
+def backfill_telemetry_organizations():
+    """
+    Add and fill the organization column of the telemetry tables.
+    
+    Only samples without an organization are updated, so the backfill can
+    be re-run safely. Returns the number of updated samples by table.
+    """
+    updated = {}
+    
+    for table, included_columns in _TELEMETRY_TABLES.items():
+        db.session.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS organization_id varchar(36) "
+            f"REFERENCES organizations(id) ON DELETE CASCADE"
+        ))
+        db.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_organization_time "
+            f"ON {table} (organization_id, time) INCLUDE ({', '.join(included_columns)})"
+        ))
+        
+        # Samples take the current owner of their device, the best record
+        # left of who owned it when they were taken
+        result = db.session.execute(text(
+            f"UPDATE {table} t SET organization_id = d.organization_id "
+            f"FROM devices d WHERE d.id = t.device_id AND t.organization_id IS NULL"
+        ))
+        updated[table] = result.rowcount
+    
+    db.session.commit()
+    
+    current_app.logger.info(
+        "Telemetry organizations backfilled: "
+        + ", ".join(f"{count} {table} samples" for table, count in updated.items())
+    )
+    return updated
+
+
+if __name__ == '__main__':
+    from src.main import app
+    
+    with app.app_context():
+        backfill_telemetry_organizations()
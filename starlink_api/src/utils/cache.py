@@ -0,0 +1,179 @@
+"""
+Caching utilities for the Starlink Platform API.
+"""
+import time
+import redis
+from collections import Counter
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, request
+
+# Freshness bounds in seconds of each cache policy. A response stays fresh
+# for the time it took to generate plus a buffer, clamped to these bounds.
+CACHE_POLICIES = {
+    'short': (5, 15),
+    'normal': (30, 120),
+    'long': (60, 300),
+}
+CACHE_FRESHNESS_BUFFER = 1
+
+# How long a stale response is kept to answer in place of a failing handler
+CACHE_STALE_RETENTION = 3600
+
+# Per-process cache outcome counters, reported by the health check
+cache_stats = Counter()
+
+# Connect and read timeouts of Redis calls in seconds, kept short so an
+# unreachable Redis fails fast and requests fall back to the database
+REDIS_CONNECT_TIMEOUT = 0.2
+REDIS_SOCKET_TIMEOUT = 0.5
+
+def init_cache(app):
+    """Create the Redis client used for response caching."""
+    app.extensions['redis'] = redis.Redis.from_url(
+        app.config['REDIS_URL'],
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT
+    )
+
+
+def get_redis():
+    """Get the Redis client of the current application."""
+    return current_app.extensions['redis']
+
+
+def cached_json(key_func, timeout=60):
+    """
+    Decorator that caches successful JSON responses in Redis.
+    
+    The cache key is built by calling key_func with the view arguments. On a
+    hit the stored bytes are returned as-is, skipping the database and schema
+    serialization entirely. Redis errors are logged and treated as a miss.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = key_func(**kwargs)
+            client = get_redis()
+            
+            try:
+                body = client.get(key)
+            except redis.RedisError as e:
+                current_app.logger.warning(f"Cache read error: {str(e)}")
+                return f(*args, **kwargs)
+            
+            if body is not None:
+                return current_app.response_class(body, mimetype='application/json')
+            
+            response = current_app.make_response(f(*args, **kwargs))
+            
+            if response.status_code == 200:
+                try:
+                    client.set(key, response.get_data(), ex=timeout)
+                except redis.RedisError as e:
+                    current_app.logger.warning(f"Cache write error: {str(e)}")
+            
+            return response
+        return decorated
+    return decorator
+
+
+def request_cache_key(prefix):
+    """Build a cache key from a prefix and the request's query parameters."""
+    return prefix + urlencode(sorted(request.args.items(multi=True)))
+
+
+def _cached_entry_response(entry):
+    """
+    Create the response of a cache entry.
+    
+    Entries of handlers that validate by ETag keep it, so a matching client
+    copy is still answered with 304 Not Modified.
+    """
+    etag = entry.get(b'etag', b'').decode('utf-8')
+    
+    if etag and request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(entry[b'body'], mimetype='application/json')
+    
+    if etag:
+        response.set_etag(etag)
+    
+    return response
+
+
+def cached_response(key_func, policy='normal'):
+    """
+    Decorator that caches successful JSON responses in Redis with a policy.
+    
+    Entries are Redis hashes holding the body, its ETag if any and the time
+    it goes stale, derived from how long the response took to generate and
+    bounded by the policy in CACHE_POLICIES. Stale entries are kept for a
+    while after that and served instead of a server error should the
+    handler fail. Streamed responses are passed through uncached, since
+    caching them would buffer the whole body.
+    """
+    min_fresh, max_fresh = CACHE_POLICIES[policy]
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = key_func(**kwargs)
+            client = get_redis()
+            
+            try:
+                entry = client.hgetall(key)
+            except redis.RedisError as e:
+                current_app.logger.warning(f"Cache read error: {str(e)}")
+                entry = {}
+            
+            if entry and float(entry[b'stale_at']) > time.time():
+                cache_stats['hit'] += 1
+                return _cached_entry_response(entry)
+            
+            cache_stats['miss'] += 1
+            started = time.time()
+            response = current_app.make_response(f(*args, **kwargs))
+            elapsed = time.time() - started
+            
+            if response.status_code >= 500 and entry:
+                cache_stats['stale'] += 1
+                return _cached_entry_response(entry)
+            
+            if response.status_code == 200 and not response.is_streamed:
+                fresh_for = min(max(elapsed + CACHE_FRESHNESS_BUFFER, min_fresh), max_fresh)
+                try:
+                    pipe = client.pipeline()
+                    pipe.hset(key, mapping={
+                        'body': response.get_data(),
+                        'stale_at': started + fresh_for,
+                        'etag': response.get_etag()[0] or ''
+                    })
+                    pipe.expire(key, int(fresh_for) + CACHE_STALE_RETENTION)
+                    pipe.execute()
+                except redis.RedisError as e:
+                    current_app.logger.warning(f"Cache write error: {str(e)}")
+            
+            return response
+        return decorated
+    return decorator
+
+
+def invalidate(*keys):
+    """Remove cached responses."""
+    try:
+        get_redis().delete(*keys)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Cache invalidation error: {str(e)}")
+
+
+def invalidate_prefix(prefix):
+    """Remove every cached response whose key starts with prefix."""
+    try:
+        client = get_redis()
+        keys = list(client.scan_iter(match=f"{prefix}*", count=500))
+        if keys:
+            client.delete(*keys)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Cache invalidation error: {str(e)}")
@@ -2,9 +2,12 @@
 Error handling utilities for the Starlink Platform API.
 """
 from flask import jsonify
+from src.utils.responses import error_response
 
 class APIError(Exception):
     """Base class for API errors."""
+    __slots__ = ('message', 'status_code', 'payload')
+    
     def __init__(self, message, status_code=400, payload=None):
         super().__init__()
         self.message = message
@@ -21,36 +24,48 @@ class APIError(Exception):
 
 class NotFoundError(APIError):
     """Resource not found error."""
+    __slots__ = ()
+    
     def __init__(self, message="Resource not found", payload=None):
         super().__init__(message, 404, payload)
 
 
 class ValidationError(APIError):
     """Validation error."""
+    __slots__ = ()
+    
     def __init__(self, message="Validation error", payload=None):
         super().__init__(message, 400, payload)
 
 
 class AuthenticationError(APIError):
     """Authentication error."""
+    __slots__ = ()
+    
     def __init__(self, message="Authentication error", payload=None):
         super().__init__(message, 401, payload)
 
 
 class AuthorizationError(APIError):
     """Authorization error."""
+    __slots__ = ()
+    
     def __init__(self, message="Authorization error", payload=None):
         super().__init__(message, 403, payload)
 
 
 class RateLimitError(APIError):
     """Rate limit error."""
+    __slots__ = ()
+    
     def __init__(self, message="Rate limit exceeded", payload=None):
         super().__init__(message, 429, payload)
 
 
 class ServerError(APIError):
     """Server error."""
+    __slots__ = ()
+    
     def __init__(self, message="Internal server error", payload=None):
         super().__init__(message, 500, payload)
 
@@ -68,56 +83,35 @@ def register_error_handlers(app):
     @app.errorhandler(404)
     def handle_not_found(error):
         """Handle 404 errors."""
-        return jsonify({
-            'status': 'error',
-            'message': 'Resource not found'
-        }), 404
+        return error_response('Resource not found', status_code=404)
     
     @app.errorhandler(400)
     def handle_bad_request(error):
         """Handle 400 errors."""
-        return jsonify({
-            'status': 'error',
-            'message': 'Bad request'
-        }), 400
+        return error_response('Bad request', status_code=400)
     
     @app.errorhandler(401)
     def handle_unauthorized(error):
         """Handle 401 errors."""
-        return jsonify({
-            'status': 'error',
-            'message': 'Unauthorized'
-        }), 401
+        return error_response('Unauthorized', status_code=401)
     
     @app.errorhandler(403)
     def handle_forbidden(error):
         """Handle 403 errors."""
-        return jsonify({
-            'status': 'error',
-            'message': 'Forbidden'
-        }), 403
+        return error_response('Forbidden', status_code=403)
     
     @app.errorhandler(405)
     def handle_method_not_allowed(error):
         """Handle 405 errors."""
-        return jsonify({
-            'status': 'error',
-            'message': 'Method not allowed'
-        }), 405
+        return error_response('Method not allowed', status_code=405)
     
     @app.errorhandler(429)
     def handle_rate_limit_exceeded(error):
         """Handle 429 errors."""
-        return jsonify({
-            'status': 'error',
-            'message': 'Rate limit exceeded'
-        }), 429
+        return error_response('Rate limit exceeded', status_code=429)
     
     @app.errorhandler(500)
     def handle_internal_server_error(error):
         """Handle 500 errors."""
-        return jsonify({
-            'status': 'error',
-            'message': 'Internal server error'
-        }), 500
+        return error_response('Internal server error', status_code=500)
 
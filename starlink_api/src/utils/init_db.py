@@ -1,194 +1,259 @@
 """
 Database initialization script for the Starlink Platform API.
 """
+import hashlib
+import json
+import redis
+from flask import current_app
+from sqlalchemy import insert, delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from werkzeug.security import generate_password_hash
 from src.models import db
 from src.models.user import User, Role, Permission, UserRole, RolePermission
+from src.utils.auth import PERMISSIONS, clear_role_masks
+from src.utils.cache import get_redis
+
+# Roles and their descriptions
+ROLES = {
+    'Super Admin': 'Full access to all features',
+    'Admin': 'Administrative access to manage organizations and users',
+    'Organization Admin': 'Administrative access within an organization',
+    'Technician': 'Access to device management and technical operations',
+    'Support': 'Access to support features',
+    'Viewer': 'Read-only access',
+    'Client': 'Client access to their own data'
+}
+
+# Permissions granted to each role
+ROLE_PERMISSIONS = {
+    'Super Admin': [f"{resource}.{action}" for resource, action in PERMISSIONS],
+    'Admin': [
+        'user.create', 'user.read', 'user.update', 'user.delete',
+        'organization.create', 'organization.read', 'organization.update', 'organization.delete',
+        'device.read', 'telemetry.read',
+        'support.read', 'support.update',
+        'notification.read', 'notification.update'
+    ],
+    'Organization Admin': [
+        'user.create', 'user.read', 'user.update',
+        'organization.read', 'organization.update',
+        'device.create', 'device.read', 'device.update',
+        'telemetry.read',
+        'support.create', 'support.read', 'support.update',
+        'notification.read', 'notification.update'
+    ],
+    'Technician': [
+        'device.read', 'device.update',
+        'telemetry.read', 'telemetry.sync',
+        'support.create', 'support.read', 'support.update'
+    ],
+    'Support': [
+        'user.read',
+        'organization.read',
+        'device.read',
+        'telemetry.read',
+        'support.create', 'support.read', 'support.update'
+    ],
+    'Viewer': [
+        'user.read',
+        'organization.read',
+        'device.read',
+        'telemetry.read',
+        'support.read',
+        'notification.read'
+    ],
+    'Client': [
+        'device.read',
+        'telemetry.read',
+        'support.create', 'support.read',
+        'notification.read'
+    ]
+}
+
+# Redis key recording the version of the roles and permissions last
+# initialized, so unchanged definitions aren't synced on every start
+RBAC_VERSION_KEY = 'rbac:version'
+
+
+def get_rbac_version():
+    """Hash the role and permission definitions into a version string."""
+    definitions = json.dumps([ROLES, PERMISSIONS, ROLE_PERMISSIONS], sort_keys=True)
+    return hashlib.sha256(definitions.encode('utf-8')).hexdigest()
+
+
+def is_rbac_current(version):
+    """
+    Check whether roles and permissions were last initialized at version.
+    
+    The stored version is only trusted while the database holds role
+    permissions, so a recreated database is always initialized.
+    """
+    try:
+        stored_version = get_redis().get(RBAC_VERSION_KEY)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Cache read error: {str(e)}")
+        return False
+    
+    if stored_version != version.encode('utf-8'):
+        return False
+    
+    return db.session.query(db.session.query(RolePermission).exists()).scalar()
+
+
+def store_rbac_version(version):
+    """Record the version of the roles and permissions just initialized."""
+    try:
+        get_redis().set(RBAC_VERSION_KEY, version)
+    except redis.RedisError as e:
+        current_app.logger.warning(f"Cache write error: {str(e)}")
+
 
 def init_roles_and_permissions():
     """
     Initialize roles and permissions in the database.
+    
+    Changes are not committed; the caller commits them.
     """
-    print("Initializing roles and permissions...")
-    
-    # Create roles
-    roles = {
-        'Super Admin': 'Full access to all features',
-        'Admin': 'Administrative access to manage organizations and users',
-        'Organization Admin': 'Administrative access within an organization',
-        'Technician': 'Access to device management and technical operations',
-        'Support': 'Access to support features',
-        'Viewer': 'Read-only access',
-        'Client': 'Client access to their own data'
-    }
+    current_app.logger.info("Initializing roles and permissions...")
+    
+    # Insert the missing roles and permissions, leaving existing ones as
+    # they are, then read back the IDs of all of them
+    created_roles = db.session.execute(
+        pg_insert(Role).on_conflict_do_nothing(index_elements=['name']).returning(Role.name),
+        [{'name': name, 'description': description} for name, description in ROLES.items()]
+    ).scalars().all()
+    for name in created_roles:
+        current_app.logger.debug("Created role: %s", name)
     
-    role_objects = {}
-    for name, description in roles.items():
-        role = Role.query.filter_by(name=name).first()
-        if not role:
-            role = Role(name=name, description=description)
-            db.session.add(role)
-            print(f"Created role: {name}")
-        role_objects[name] = role
+    role_ids = dict(db.session.query(Role.name, Role.id))
     
     # Create permissions
-    permissions = [
-        # User management
-        ('user', 'create'),
-        ('user', 'read'),
-        ('user', 'update'),
-        ('user', 'delete'),
-        
-        # Organization management
-        ('organization', 'create'),
-        ('organization', 'read'),
-        ('organization', 'update'),
-        ('organization', 'delete'),
-        
-        # Device management
-        ('device', 'create'),
-        ('device', 'read'),
-        ('device', 'update'),
-        ('device', 'delete'),
-        
-        # Telemetry
-        ('telemetry', 'read'),
-        ('telemetry', 'sync'),
-        
-        # Support
-        ('support', 'create'),
-        ('support', 'read'),
-        ('support', 'update'),
-        ('support', 'delete'),
-        
-        # Notification
-        ('notification', 'create'),
-        ('notification', 'read'),
-        ('notification', 'update'),
-        ('notification', 'delete'),
-    ]
+    permissions = PERMISSIONS
     
-    permission_objects = {}
-    for resource, action in permissions:
-        permission = Permission.query.filter_by(resource=resource, action=action).first()
-        if not permission:
-            permission = Permission(resource=resource, action=action)
-            db.session.add(permission)
-            print(f"Created permission: {resource}.{action}")
-        permission_objects[f"{resource}.{action}"] = permission
+    created_permissions = db.session.execute(
+        pg_insert(Permission).on_conflict_do_nothing(index_elements=['resource', 'action']).returning(Permission.name),
+        [
+            {'name': f"{resource}.{action}", 'resource': resource, 'action': action}
+            for resource, action in permissions
+        ]
+    ).scalars().all()
+    for name in created_permissions:
+        current_app.logger.debug("Created permission: %s", name)
     
-    # Commit to get IDs
-    db.session.commit()
+    permission_ids = {
+        f"{resource}.{action}": permission_id
+        for resource, action, permission_id in db.session.query(
+            Permission.resource, Permission.action, Permission.id
+        )
+    }
     
     # Assign permissions to roles
-    role_permissions = {
-        'Super Admin': [f"{resource}.{action}" for resource, action in permissions],
-        'Admin': [
-            'user.create', 'user.read', 'user.update', 'user.delete',
-            'organization.create', 'organization.read', 'organization.update', 'organization.delete',
-            'device.read', 'telemetry.read',
-            'support.read', 'support.update',
-            'notification.read', 'notification.update'
-        ],
-        'Organization Admin': [
-            'user.create', 'user.read', 'user.update',
-            'organization.read', 'organization.update',
-            'device.create', 'device.read', 'device.update',
-            'telemetry.read',
-            'support.create', 'support.read', 'support.update',
-            'notification.read', 'notification.update'
-        ],
-        'Technician': [
-            'device.read', 'device.update',
-            'telemetry.read', 'telemetry.sync',
-            'support.create', 'support.read', 'support.update'
-        ],
-        'Support': [
-            'user.read',
-            'organization.read',
-            'device.read',
-            'telemetry.read',
-            'support.create', 'support.read', 'support.update'
-        ],
-        'Viewer': [
-            'user.read',
-            'organization.read',
-            'device.read',
-            'telemetry.read',
-            'support.read',
-            'notification.read'
-        ],
-        'Client': [
-            'device.read',
-            'telemetry.read',
-            'support.create', 'support.read',
-            'notification.read'
-        ]
+    # Assignments wanted, by role and permission ID
+    assignments = {}
+    for role_name, permission_keys in ROLE_PERMISSIONS.items():
+        role_id = role_ids[role_name]
+        for permission_key in permission_keys:
+            assignments[(role_id, permission_ids[permission_key])] = (role_name, permission_key)
+    
+    # Only write the assignments that differ from the stored ones, so a
+    # re-run on an up-to-date database writes nothing
+    existing = {
+        (role_id, permission_id)
+        for role_id, permission_id in db.session.query(RolePermission.role_id, RolePermission.permission_id)
     }
     
-    # Clear existing role permissions
-    RolePermission.query.delete()
+    removed = existing - assignments.keys()
+    if removed:
+        # No RolePermission objects are loaded, so there is nothing in the
+        # session to synchronize with the deleted rows
+        db.session.execute(
+            delete(RolePermission)
+            .where(tuple_(RolePermission.role_id, RolePermission.permission_id).in_(removed))
+            .execution_options(synchronize_session=False)
+        )
     
-    # Assign permissions to roles
-    for role_name, permission_keys in role_permissions.items():
-        role = role_objects[role_name]
-        for permission_key in permission_keys:
-            permission = permission_objects[permission_key]
-            role_permission = RolePermission(role_id=role.id, permission_id=permission.id)
-            db.session.add(role_permission)
-            print(f"Assigned permission {permission_key} to role {role_name}")
-    
-    # Commit changes
-    db.session.commit()
-    print("Roles and permissions initialized successfully")
+    added = assignments.keys() - existing
+    if added:
+        db.session.execute(insert(RolePermission), [
+            {'role_id': role_id, 'permission_id': permission_id}
+            for role_id, permission_id in added
+        ])
+        for key in added:
+            current_app.logger.debug("Assigned permission %s to role %s", assignments[key][1], assignments[key][0])
+    
+    # Log a single summary; per-row details are only logged at debug level
+    current_app.logger.info(
+        "Roles and permissions initialized: %d roles and %d permissions created, "
+        "%d assignments added and %d removed",
+        len(created_roles), len(created_permissions), len(added), len(removed)
+    )
 
 def create_admin_user(email, password, first_name='Admin', last_name='User'):
     """
     Create an admin user if it doesn't exist.
+    
+    The password is hashed with SEED_PASSWORD_HASH_METHOD. Seeded credentials are
+    meant for bootstrapping only and should be changed on first login. The
+    user is added to the session; the caller commits it.
     """
-    print(f"Creating admin user: {email}")
+    current_app.logger.info("Creating admin user: %s", email)
     
     # Check if user already exists
     user = User.query.filter_by(email=email).first()
     if user:
-        print(f"User {email} already exists")
+        current_app.logger.info("User %s already exists", email)
         return user
     
-    # Create user
+    # Create user; its password is only hashed once we know it's needed
     user = User(
         email=email,
-        password_hash=generate_password_hash(password),
+        password_hash=generate_password_hash(password, method=current_app.config['SEED_PASSWORD_HASH_METHOD']),
         first_name=first_name,
         last_name=last_name,
         is_active=True
     )
     db.session.add(user)
-    db.session.commit()
     
-    # Assign Super Admin role
-    super_admin_role = Role.query.filter_by(name='Super Admin').first()
-    if super_admin_role:
-        user_role = UserRole(user_id=user.id, role_id=super_admin_role.id)
-        db.session.add(user_role)
-        db.session.commit()
+    # Assign Super Admin role, inserted along with the user
+    super_admin_role_id = db.session.execute(
+        select(Role.id).filter_by(name='Super Admin')
+    ).scalar()
+    if super_admin_role_id:
+        user.roles.append(UserRole(role_id=super_admin_role_id))
     
-    print(f"Admin user {email} created successfully")
+    current_app.logger.info("Admin user %s created successfully", email)
     return user
 
 def init_db():
     """
     Initialize the database with default data.
     """
-    print("Initializing database...")
+    current_app.logger.info("Initializing database...")
     
     # Create tables
     db.create_all()
     
-    # Initialize roles and permissions
-    init_roles_and_permissions()
+    # Roles and permissions are only synced when their definitions changed
+    # since they were last initialized
+    rbac_version = get_rbac_version()
+    sync_rbac = not is_rbac_current(rbac_version)
+    if not sync_rbac:
+        current_app.logger.info("Roles and permissions are up to date")
+    
+    # Seed roles, permissions and the admin user in a single transaction
+    try:
+        if sync_rbac:
+            init_roles_and_permissions()
+        create_admin_user('admin@example.com', 'adminpassword')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
     
-    # Create admin user
-    create_admin_user('admin@example.com', 'adminpassword')
+    if sync_rbac:
+        # Role permissions may have changed
+        clear_role_masks()
+        store_rbac_version(rbac_version)
     
-    print("Database initialization completed")
+    current_app.logger.info("Database initialization completed")
 
@@ -0,0 +1,47 @@
+"""
+JSON provider for the Starlink Platform API.
+"""
+import decimal
+import uuid
+import orjson
+from flask.json.provider import JSONProvider
+
+def _default(obj):
+    """Encode types orjson doesn't handle natively."""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """
+    Serialize data as JSON bytes.
+    
+    Non-string dict keys are converted to strings, as the standard library
+    encoder does, rather than rejected.
+    """
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider that encodes and decodes with orjson."""
+    
+    def dumps(self, obj, **kwargs):
+        """Serialize data as a JSON string."""
+        return dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        """Deserialize data from a JSON string or bytes."""
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """Create a JSON response, passing the encoded bytes straight through."""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype='application/json')
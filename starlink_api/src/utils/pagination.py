@@ -0,0 +1,64 @@
+"""
+Pagination utilities for the Starlink Platform API.
+"""
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import tuple_
+from src.utils.error_handlers import ValidationError as APIValidationError
+
+def encode_cursor(timestamp, id):
+    """Encode a (timestamp, id) position as an opaque cursor."""
+    raw = f"{timestamp.isoformat()}|{id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into its (timestamp, id) position."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        timestamp, id = raw.split('|', 1)
+        return datetime.fromisoformat(timestamp), id
+    except (ValueError, UnicodeError, binascii.Error):
+        raise APIValidationError('Invalid cursor')
+
+
+def offset_paginate(query, page, per_page):
+    """
+    Fetch a page of rows by offset.
+    
+    One extra row is fetched to tell whether a next page exists, which
+    avoids the COUNT query of paginate(). Returns the page items and
+    whether more rows follow.
+    """
+    items = query.limit(per_page + 1).offset((max(page, 1) - 1) * per_page).all()
+    return items[:per_page], len(items) > per_page
+
+
+def keyset_paginate(query, model, cursor, per_page, sort_column=None):
+    """
+    Fetch a page of newest-first rows positioned after cursor.
+    
+    Rows are ordered by (sort_column, id) descending, sort_column being
+    created_at unless given, so the position of the last row is enough to
+    resume and no rows are skipped with OFFSET. An empty cursor starts from
+    the newest row.
+    
+    Returns the page items and the cursor of the next page, or None when
+    this is the last page.
+    """
+    if sort_column is None:
+        sort_column = model.created_at
+    
+    query = query.order_by(sort_column.desc(), model.id.desc())
+    
+    if cursor:
+        query = query.filter(tuple_(sort_column, model.id) < decode_cursor(cursor))
+    
+    items = query.limit(per_page + 1).all()
+    
+    if len(items) <= per_page:
+        return items, None
+    
+    items = items[:per_page]
+    return items, encode_cursor(getattr(items[-1], sort_column.key), items[-1].id)
@@ -1,45 +1,188 @@
 """
 Response utilities for the Starlink Platform API.
 """
-from flask import jsonify
+from functools import lru_cache
+from flask import current_app, request, stream_with_context
+from src.utils.json_provider import dumps
+
+# Pre-encoded pieces of the response envelopes
+_SUCCESS_PREFIX = b'{"status":"success"'
+_ERROR_PREFIX = b'{"status":"error"'
+_MESSAGE_KEY = b',"message":'
+_DATA_KEY = b',"data":'
+_ERRORS_KEY = b',"errors":'
+
+
+def _json_response(body, status_code=200):
+    """Wrap an encoded JSON body in a response."""
+    return current_app.response_class(body, status=status_code, mimetype='application/json')
+
 
 def success_response(data=None, message=None, status_code=200):
     """Create a success response."""
-    response = {
-        'status': 'success'
-    }
+    body = _SUCCESS_PREFIX
     
     if message:
-        response['message'] = message
+        body += _MESSAGE_KEY + dumps(message)
     
     if data is not None:
-        response['data'] = data
+        body += _DATA_KEY + dumps(data)
+    
+    return _json_response(body + b'}', status_code)
+
+
+def raw_success_response(data_json, status_code=200):
+    """Create a success response around an already-encoded JSON payload."""
+    if isinstance(data_json, str):
+        data_json = data_json.encode('utf-8')
+    
+    return _json_response(_SUCCESS_PREFIX + _DATA_KEY + data_json + b'}', status_code)
+
+
+def entity_etag(id, updated_at):
+    """Build the ETag of an entity version from its ID and last update time."""
+    return f"{id}-{updated_at.timestamp() if updated_at else 0}"
+
+
+def conditional_response(etag, build, max_age=60):
+    """
+    Create a response validated by ETag.
+    
+    Returns 304 Not Modified when the client's cached copy matches etag, so
+    build is only called to produce the full response when it has changed.
+    Clients may reuse their copy without revalidating for max_age seconds.
+    """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(build())
     
-    return jsonify(response), status_code
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+@lru_cache(maxsize=1024)
+def _error_body(message):
+    """Encode the body of an error response without details, which recur."""
+    return _ERROR_PREFIX + _MESSAGE_KEY + dumps(message) + b'}'
 
 
 def error_response(message, status_code=400, errors=None):
     """Create an error response."""
-    response = {
-        'status': 'error',
-        'message': message
+    if errors:
+        body = _ERROR_PREFIX + _MESSAGE_KEY + dumps(message) + _ERRORS_KEY + dumps(errors) + b'}'
+    else:
+        body = _error_body(message)
+    
+    return _json_response(body, status_code)
+
+
+@lru_cache(maxsize=64)
+def _message_body(message):
+    """Encode the body of a bare message response."""
+    return b'{"message":' + dumps(message) + b'}'
+
+
+def message_response(message, status_code):
+    """Create a response carrying only a message, as the auth decorators return."""
+    return _json_response(_message_body(message), status_code)
+
+
+def _pagination(page, per_page, total=None, has_more=None):
+    """Build the pagination part of a paginated response."""
+    pagination = {
+        'page': page,
+        'per_page': per_page
     }
     
-    if errors:
-        response['errors'] = errors
+    if total is not None:
+        pagination['total'] = total
+        pagination['pages'] = -(-total // per_page)
     
-    return jsonify(response), status_code
+    if has_more is not None:
+        pagination['has_more'] = has_more
+    
+    return pagination
 
 
-def pagination_response(data, page, per_page, total):
-    """Create a paginated response."""
+def _stream_paginated(items, serialize, pagination, probe=None):
+    """
+    Stream a paginated response, encoding and sending one item at a time.
+    
+    With probe set to the page size, an item beyond the page is not sent
+    but reported as has_more.
+    """
+    def generate():
+        yield _SUCCESS_PREFIX + _DATA_KEY + b'{"items":['
+        has_more = False
+        for index, item in enumerate(items):
+            if index == probe:
+                has_more = True
+                break
+            yield (b',' if index else b'') + dumps(item if serialize is None else serialize(item))
+        
+        if probe is not None:
+            pagination['has_more'] = has_more
+        yield b'],"pagination":' + dumps(pagination) + b'}}'
+    
+    return _json_response(stream_with_context(generate()))
+
+
+def pagination_response(data, page, per_page, total=None, has_more=None, stream=False):
+    """
+    Create a paginated response.
+    
+    Endpoints that count their rows pass total; endpoints that only probe
+    for a next page pass has_more instead. With stream, data may be any
+    iterable, such as a generator of serialized rows, and its items are
+    encoded and sent one at a time instead of as one list. Streamed data
+    is only read after the handler returns, so query iterators should be
+    started first for database errors to reach the handler.
+    """
+    pagination = _pagination(page, per_page, total, has_more)
+    
+    if stream:
+        return _stream_paginated(data, None, pagination)
+    
+    return success_response({
+        'items': data,
+        'pagination': pagination
+    })
+
+
+def keyset_pagination_response(data, per_page, next_cursor):
+    """Create a cursor-paginated response."""
     return success_response({
         'items': data,
         'pagination': {
-            'page': page,
             'per_page': per_page,
-            'total': total,
-            'pages': (total + per_page - 1) // per_page
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         }
     })
 
+
+def stream_list_response(items, serialize):
+    """Create a success response whose list is encoded and sent one item at a time."""
+    def generate():
+        yield _SUCCESS_PREFIX + _DATA_KEY + b'['
+        for index, item in enumerate(items):
+            yield (b',' if index else b'') + dumps(serialize(item))
+        yield b']}'
+    
+    return _json_response(stream_with_context(generate()))
+
+
+def stream_pagination_response(items, serialize, page, per_page, total=None):
+    """
+    Create a paginated response that is encoded and sent one item at a time.
+    
+    The envelope matches pagination_response, but only a single serialized
+    item is held in memory at any point while the body is written. Without
+    a total, items may hold one row beyond the page, which is not sent but
+    reported as has_more.
+    """
+    pagination = _pagination(page, per_page, total)
+    return _stream_paginated(items, serialize, pagination, probe=per_page if total is None else None)
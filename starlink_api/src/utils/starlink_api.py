@@ -1,10 +1,11 @@
 """
 Starlink API utilities for the Starlink Platform API.
 """
-import requests
-import time
-from flask import current_app
-from src.utils.auth import get_starlink_access_token
+import orjson
+from flask import current_app, g
+from src.utils.auth import (
+    get_starlink_access_token, invalidate_starlink_access_token, starlink_session, STARLINK_TIMEOUT
+)
 
 class StarlinkAPI:
     """Starlink API client."""
@@ -13,52 +14,72 @@ class StarlinkAPI:
         """Initialize Starlink API client."""
         self.base_url = current_app.config['STARLINK_API_URL']
         self.access_token = None
-        self.token_expiry = 0
     
     def _ensure_token(self):
         """Ensure access token is valid."""
-        current_time = time.time()
-        if not self.access_token or current_time >= self.token_expiry:
-            self.access_token = get_starlink_access_token()
-            if self.access_token:
-                # Token typically expires in 15 minutes, but we'll refresh after 14 minutes
-                self.token_expiry = current_time + 14 * 60
-            else:
-                raise Exception("Failed to get Starlink access token")
+        # Tokens are cached and refreshed before they expire by
+        # get_starlink_access_token
+        self.access_token = get_starlink_access_token()
+        if not self.access_token:
+            raise Exception("Failed to get Starlink access token")
     
     def get_telemetry(self, account_number, batch_size=1000, max_linger_ms=15000):
-        """Get telemetry data from Starlink API."""
+        """
+        Get telemetry data from Starlink API.
+        
+        Responses are memoized on g, so clients fetching the same account's
+        telemetry within one request share a single API call.
+        """
+        telemetry_cache = g.setdefault('starlink_telemetry', {})
+        cache_key = (account_number, batch_size, max_linger_ms)
+        if cache_key in telemetry_cache:
+            return telemetry_cache[cache_key]
+        
         try:
-            self._ensure_token()
-            
-            response = requests.post(
-                f"{self.base_url}/telemetry/stream/v1/telemetry",
-                json={
-                    "accountNumber": account_number,
-                    "batchSize": batch_size,
-                    "maxLingerMs": max_linger_ms
-                },
-                headers={
-                    'Content-Type': 'application/json',
-                    'Accept': '*/*',
-                    'Authorization': f'Bearer {self.access_token}'
-                }
-            )
-            
-            if response.status_code == 401:
+            # A rejected token is refreshed and the request retried once;
+            # a second 401 is raised rather than retried again
+            for attempt in range(2):
+                self._ensure_token()
+                
+                response = starlink_session.post(
+                    f"{self.base_url}/telemetry/stream/v1/telemetry",
+                    json={
+                        "accountNumber": account_number,
+                        "batchSize": batch_size,
+                        "maxLingerMs": max_linger_ms
+                    },
+                    headers={
+                        'Content-Type': 'application/json',
+                        'Accept': '*/*',
+                        'Authorization': f'Bearer {self.access_token}'
+                    },
+                    # The stream may hold the request open for up to max_linger_ms
+                    timeout=(STARLINK_TIMEOUT[0], STARLINK_TIMEOUT[1] + max_linger_ms / 1000)
+                )
+                
+                if response.status_code != 401 or attempt:
+                    break
+                
                 # Token expired, clear it and retry
+                invalidate_starlink_access_token(self.access_token)
                 self.access_token = None
-                self.token_expiry = 0
-                return self.get_telemetry(account_number, batch_size, max_linger_ms)
             
             response.raise_for_status()
-            return response.json()
+            # orjson parses the body in one pass, without response.json()'s
+            # charset detection and text decoding of large batches
+            telemetry_cache[cache_key] = orjson.loads(response.content)
+            return telemetry_cache[cache_key]
         except Exception as e:
             current_app.logger.error(f"Failed to get telemetry data: {str(e)}")
             return None
     
     def process_telemetry_data(self, telemetry_data):
-        """Process telemetry data from Starlink API."""
+        """
+        Process telemetry data from Starlink API.
+        
+        Besides the rows in stream order, returns them indexed by device
+        type under 'by_device'.
+        """
         if not telemetry_data or 'data' not in telemetry_data:
             return None
         
@@ -71,81 +92,87 @@ class StarlinkAPI:
         # Get values (rows of data)
         values = data.get('values', [])
         
-        # Process each row of data
+        # Process each row of data, skipping rows of unknown device types or
+        # whose length doesn't match their columns
+        get_column_names = column_names_by_device_type.get
         processed_data = []
+        append = processed_data.append
+        by_device = {}
         for row in values:
             if not row or len(row) < 2:
                 continue
             
-            device_type = row[0]
-            column_names = column_names_by_device_type.get(device_type, [])
+            column_names = get_column_names(row[0])
             
             if not column_names or len(column_names) != len(row):
                 continue
             
-            # Create a dictionary for the row
-            row_dict = {}
-            for i, column_name in enumerate(column_names):
-                row_dict[column_name] = row[i]
-            
-            processed_data.append(row_dict)
+            row_dict = dict(zip(column_names, row))
+            append(row_dict)
+            by_device.setdefault(row[0], []).append(row_dict)
         
         return {
             'data': processed_data,
+            'by_device': by_device,
             'metadata': metadata
         }
     
-    def get_user_terminal_telemetry(self, account_number):
-        """Get user terminal telemetry data."""
-        telemetry_data = self.get_telemetry(account_number)
-        if not telemetry_data:
-            return []
+    def process_telemetry_columns(self, telemetry_data):
+        """
+        Process telemetry data from Starlink API into columns.
         
-        processed_data = self.process_telemetry_data(telemetry_data)
-        if not processed_data:
-            return []
+        Returns each device type's rows transposed into a list of values
+        per column, keyed by device type and column name. Unlike
+        process_telemetry_data no dict is built per row, which suits
+        callers reading a few columns of large batches.
+        """
+        if not telemetry_data or 'data' not in telemetry_data:
+            return None
         
-        # Filter for user terminal data
-        user_terminal_data = [
-            row for row in processed_data['data']
-            if row.get('DeviceType') == 'u'
-        ]
+        data = telemetry_data['data']
+        column_names_by_device_type = data.get('columnNamesByDeviceType', {})
         
-        return user_terminal_data
-    
-    def get_router_telemetry(self, account_number):
-        """Get router telemetry data."""
-        telemetry_data = self.get_telemetry(account_number)
-        if not telemetry_data:
-            return []
+        # Group the rows by device type, skipping the same rows as
+        # process_telemetry_data
+        get_column_names = column_names_by_device_type.get
+        rows_by_device_type = {}
+        for row in data.get('values', []):
+            if not row or len(row) < 2:
+                continue
+            
+            column_names = get_column_names(row[0])
+            
+            if not column_names or len(column_names) != len(row):
+                continue
+            
+            rows_by_device_type.setdefault(row[0], []).append(row)
         
-        processed_data = self.process_telemetry_data(telemetry_data)
-        if not processed_data:
-            return []
+        # Transpose each device type's rows into columns
+        return {
+            device_type: dict(zip(column_names_by_device_type[device_type], map(list, zip(*rows))))
+            for device_type, rows in rows_by_device_type.items()
+        }
+    
+    def get_all_telemetry(self, account_number):
+        """
+        Get telemetry data of all device types with a single request.
         
-        # Filter for router data
-        router_data = [
-            row for row in processed_data['data']
-            if row.get('DeviceType') == 'r'
-        ]
+        Returns the rows by device type: 'u' for user terminals, 'r' for
+        routers and 'i' for IP allocations.
+        """
+        processed_data = self.process_telemetry_data(self.get_telemetry(account_number))
+        by_device = processed_data['by_device'] if processed_data else {}
         
-        return router_data
+        return {device_type: by_device.get(device_type, []) for device_type in ('u', 'r', 'i')}
+    
+    def get_user_terminal_telemetry(self, account_number):
+        """Get user terminal telemetry data."""
+        return self.get_all_telemetry(account_number)['u']
+    
+    def get_router_telemetry(self, account_number):
+        """Get router telemetry data."""
+        return self.get_all_telemetry(account_number)['r']
     
     def get_ip_allocations(self, account_number):
         """Get IP allocation data."""
-        telemetry_data = self.get_telemetry(account_number)
-        if not telemetry_data:
-            return []
-        
-        processed_data = self.process_telemetry_data(telemetry_data)
-        if not processed_data:
-            return []
-        
-        # Filter for IP allocation data
-        ip_allocation_data = [
-            row for row in processed_data['data']
-            if row.get('DeviceType') == 'i'
-        ]
-        
-        return ip_allocation_data
-
+        return self.get_all_telemetry(account_number)['i']
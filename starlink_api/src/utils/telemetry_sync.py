@@ -0,0 +1,231 @@
+"""
+Background telemetry sync for the Starlink Platform API.
+
+Fetching an account's telemetry stream can take many seconds, so syncs run
+on a small thread pool rather than on the request's worker. Job state is
+kept in Redis, where the status endpoint can read it from any process.
+"""
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.models import db
+from src.models.device import Device, IpAllocation
+from src.models.telemetry import UserTerminalTelemetry, RouterTelemetry
+from src.utils.cache import get_redis
+from src.utils.error_handlers import ServerError
+from src.utils.starlink_api import StarlinkAPI
+
+# How long finished job states are kept, in seconds
+SYNC_JOB_TTL = 86400
+
+# Jobs still queued or running this many seconds after being queued are
+# reported as failed, as their worker has most likely been restarted
+SYNC_JOB_TIMEOUT = 1800
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='telemetry-sync')
+
+# Model and stored columns of each telemetry stream device type, mapping
+# model columns to stream column names
+_TELEMETRY_COLUMNS = {
+    'u': (UserTerminalTelemetry, {
+        'time': 'UtcTimestampNs',
+        'downlink_throughput': 'DownlinkThroughput',
+        'uplink_throughput': 'UplinkThroughput',
+        'ping_drop_rate_avg': 'PingDropRateAvg',
+        'ping_latency_ms_avg': 'PingLatencyMsAvg',
+        'obstruction_percent_time': 'ObstructionPercentTime',
+        'uptime': 'Uptime',
+        'signal_quality': 'SignalQuality',
+        'active_alerts': 'ActiveAlerts'
+    }),
+    'r': (RouterTelemetry, {
+        'time': 'UtcTimestampNs',
+        'wifi_uptime_s': 'WifiUptimeS',
+        'internet_ping_drop_rate': 'InternetPingDropRate',
+        'internet_ping_latency_ms': 'InternetPingLatencyMs',
+        'wifi_pop_ping_drop_rate': 'WifiPopPingDropRate',
+        'wifi_pop_ping_latency_ms': 'WifiPopPingLatencyMs',
+        'dish_ping_drop_rate': 'DishPingDropRate',
+        'dish_ping_latency_ms': 'DishPingLatencyMs',
+        'clients': 'Clients',
+        'clients_2ghz': 'Clients2Ghz',
+        'clients_5ghz': 'Clients5Ghz',
+        'clients_eth': 'ClientsEth',
+        'wan_tx_bytes': 'WanTxBytes',
+        'wan_rx_bytes': 'WanRxBytes',
+        'active_alerts': 'ActiveAlerts'
+    }),
+    'i': (IpAllocation, {
+        'ipv4': 'Ipv4',
+        'ipv6_ue': 'Ipv6Ue',
+        'ipv6_cpe': 'Ipv6Cpe'
+    })
+}
+
+
+def _job_key(job_id):
+    """Get the Redis key of a sync job."""
+    return f"telemetry:sync:{job_id}"
+
+
+def sync_account_telemetry(account_number):
+    """
+    Fetch an account's telemetry from the Starlink API and store it.
+    
+    Returns the number of stored rows by device type name.
+    """
+    # Initialize Starlink API client
+    starlink_api = StarlinkAPI()
+    
+    # Get telemetry data from Starlink API
+    telemetry_data = starlink_api.get_telemetry(account_number)
+    if not telemetry_data:
+        raise ServerError('Failed to get telemetry data from Starlink API')
+    
+    # Process telemetry data into columns by device type
+    columns_by_type = starlink_api.process_telemetry_columns(telemetry_data)
+    if columns_by_type is None:
+        raise ServerError('Failed to process telemetry data')
+    
+    # Resolve the devices referenced by the rows, and their owners, in one query
+    serials = set()
+    for columns in columns_by_type.values():
+        serials.update(columns.get('DeviceId', ()))
+    devices = {
+        serial: (device_id, organization_id)
+        for serial, device_id, organization_id in db.session.query(
+            Device.device_id, Device.id, Device.organization_id
+        ).filter(Device.device_id.in_(serials))
+    }
+    
+    # Build insert parameters by device type from the stored columns only,
+    # skipping unknown device types and devices
+    rows_by_type = {device_type: [] for device_type in _TELEMETRY_COLUMNS}
+    
+    for device_type, rows in rows_by_type.items():
+        columns = columns_by_type.get(device_type)
+        if not columns:
+            continue
+        
+        row_count = len(next(iter(columns.values())))
+        stored_columns = _TELEMETRY_COLUMNS[device_type][1]
+        stored_values = [columns.get(name) or [None] * row_count for name in stored_columns.values()]
+        
+        for serial, values in zip(columns.get('DeviceId') or [None] * row_count, zip(*stored_values)):
+            device = devices.get(serial)
+            if device is None:
+                continue
+            
+            params = dict(zip(stored_columns, values))
+            params['device_id'] = device[0]
+            
+            # Telemetry samples also record the device's organization;
+            # samples without a timestamp can't be stored
+            if 'time' in params:
+                if params['time'] is None:
+                    continue
+                params['time'] = datetime.utcfromtimestamp(params['time'] / 1e9)
+                params['organization_id'] = device[1]
+            
+            rows.append(params)
+    
+    # IP allocations have no natural key to conflict on, so the synced
+    # devices' allocations are replaced rather than added to
+    if rows_by_type['i']:
+        db.session.execute(
+            delete(IpAllocation)
+            .where(IpAllocation.device_id.in_({row['device_id'] for row in rows_by_type['i']}))
+            .execution_options(synchronize_session=False)
+        )
+    
+    # Insert each device type's rows in a single statement; samples
+    # stored by an earlier sync are left as they are
+    for device_type, rows in rows_by_type.items():
+        if rows:
+            model = _TELEMETRY_COLUMNS[device_type][0]
+            db.session.execute(pg_insert(model).on_conflict_do_nothing(), rows)
+    
+    db.session.commit()
+    
+    return {
+        'user_terminal_count': len(rows_by_type['u']),
+        'router_count': len(rows_by_type['r']),
+        'ip_allocation_count': len(rows_by_type['i'])
+    }
+
+
+def _run_sync_job(app, job_id, account_number):
+    """
+    Run a queued sync job, recording its outcome.
+    
+    Nothing waits on the job's future, so every error, including failing
+    to record the job state, is logged here rather than raised.
+    """
+    with app.app_context():
+        key = _job_key(job_id)
+        
+        try:
+            client = get_redis()
+            client.hset(key, mapping={'status': 'running'})
+            
+            try:
+                counts = sync_account_telemetry(account_number)
+                state = {'status': 'succeeded', **counts}
+            
+            except ServerError as e:
+                db.session.rollback()
+                state = {'status': 'failed', 'message': e.message}
+            
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Sync telemetry error: {str(e)}")
+                state = {'status': 'failed', 'message': 'An error occurred while syncing telemetry data'}
+            
+            client.hset(key, mapping=state)
+            client.expire(key, SYNC_JOB_TTL)
+        
+        except Exception as e:
+            app.logger.error(f"Sync job {job_id} error: {str(e)}")
+
+
+def start_sync_job(account_number):
+    """Queue a telemetry sync for an account and return its job ID."""
+    job_id = str(uuid.uuid4())
+    key = _job_key(job_id)
+    
+    client = get_redis()
+    client.hset(key, mapping={'status': 'queued', 'account_number': account_number, 'queued_at': time.time()})
+    client.expire(key, SYNC_JOB_TTL)
+    
+    _executor.submit(_run_sync_job, current_app._get_current_object(), job_id, account_number)
+    return job_id
+
+
+def get_sync_job(job_id):
+    """
+    Get the state of a sync job, or None when it is unknown or expired.
+    
+    Jobs that haven't finished within SYNC_JOB_TIMEOUT of being queued are
+    reported as failed, since they were lost rather than still running.
+    """
+    state = get_redis().hgetall(_job_key(job_id))
+    if not state:
+        return None
+    
+    job = {name.decode('utf-8'): value.decode('utf-8') for name, value in state.items()}
+    for name in ('user_terminal_count', 'router_count', 'ip_allocation_count'):
+        if name in job:
+            job[name] = int(job[name])
+    
+    if 'queued_at' in job:
+        job['queued_at'] = float(job['queued_at'])
+        if job['status'] in ('queued', 'running') and time.time() - job['queued_at'] > SYNC_JOB_TIMEOUT:
+            job['status'] = 'failed'
+            job['message'] = 'Sync job did not finish'
+    
+    job['job_id'] = job_id
+    return job
@@ -0,0 +1,38 @@
+"""
+Tests for permission checks on the support routes.
+"""
+import unittest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from src.models import db
+from src.routes.support import support_bp
+
+
+class SupportPermissionsTestCase(unittest.TestCase):
+    """Tokens issued without the permissions claim fall back to the database."""
+    
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['JWT_SECRET_KEY'] = 'test_jwt_secret_key'
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        JWTManager(self.app)
+        db.init_app(self.app)
+        self.app.register_blueprint(support_bp, url_prefix='/api/support')
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            db.create_all()
+            self.token = create_access_token(identity='u1')
+    
+    def test_token_without_permissions_claim_is_checked(self):
+        response = self.client.get(
+            '/api/support/tickets',
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.get_json()['message'], 'Permission denied')
+
+
+if __name__ == '__main__':
+    unittest.main()
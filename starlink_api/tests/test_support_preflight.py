@@ -0,0 +1,42 @@
+"""
+Tests for CORS preflight requests to the support routes.
+"""
+import unittest
+from flask import Flask
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+from src.routes.support import support_bp
+
+
+class SupportPreflightTestCase(unittest.TestCase):
+    """Preflight requests carry no token and must not be rejected."""
+    
+    def setUp(self):
+        app = Flask(__name__)
+        app.config['JWT_SECRET_KEY'] = 'test_jwt_secret_key'
+        CORS(app)
+        JWTManager(app)
+        app.register_blueprint(support_bp, url_prefix='/api/support')
+        self.client = app.test_client()
+    
+    def test_preflight_is_answered(self):
+        response = self.client.options(
+            '/api/support/tickets',
+            headers={
+                'Origin': 'http://localhost:3000',
+                'Access-Control-Request-Method': 'POST',
+                'Access-Control-Request-Headers': 'Authorization, Content-Type'
+            }
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Access-Control-Allow-Origin', response.headers)
+    
+    def test_missing_token_is_still_rejected(self):
+        response = self.client.get('/api/support/tickets')
+        
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()